@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Stand-in for maketx with tunable cost, used by the benchmarks.
+
+Accepts the same arguments as the real maketx calls made by txConverter and copies the input file to the output.
+
+Environment variables:
+    FAKE_MAKETX_SLEEP: Seconds to sleep per job (simulates I/O wait).
+    FAKE_MAKETX_CPU: Seconds to spend busy looping per job (simulates pixel work).
+    FAKE_MAKETX_FAIL: Fail jobs whose input path contains this string.
+
+"""
+
+# IMPORT STANDARD LIBRARIES
+import os
+import shutil
+import sys
+import time
+
+
+def main(argv: [str]) -> int:
+    """Fake a maketx run.
+
+    Args:
+        argv: Command line arguments without the executable.
+
+    Returns:
+        Exit status.
+
+    """
+    start_time = time.perf_counter()
+    arguments = [argument for argument in argv if argument != "-v"]
+    output_path = arguments[arguments.index("-o") + 1]
+    input_path = arguments[0]
+
+    fail = os.getenv("FAKE_MAKETX_FAIL")
+    if fail and fail in input_path:
+        print("maketx ERROR: Could not open \"{}\"".format(input_path), file=sys.stderr)
+        return 1
+
+    time.sleep(float(os.getenv("FAKE_MAKETX_SLEEP", "0")))
+    busy_until = time.perf_counter() + float(os.getenv("FAKE_MAKETX_CPU", "0"))
+    while time.perf_counter() < busy_until:
+        pass
+
+    shutil.copyfile(input_path, output_path)
+    if "-v" in argv:
+        print("Reading file: {}".format(input_path))
+        print("maketx run time (seconds):  {:.3f}".format(time.perf_counter() - start_time))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
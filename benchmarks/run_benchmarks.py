@@ -0,0 +1,418 @@
+#!/usr/bin/env python
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks for the scan, model and conversion hot paths.
+
+Example:
+    python benchmarks/run_benchmarks.py --elements 100000 --output bench.json
+    python benchmarks/run_benchmarks.py --elements 100000 --compare bench.json
+
+Benchmarks whose dependencies (PyImageSequence, Qt) are missing are reported as skipped.
+
+"""
+
+# IMPORT STANDARD LIBRARIES
+import argparse
+import json
+import os
+import platform
+import shlex
+import sys
+import tempfile
+import time
+import tracemalloc
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(_HERE))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["TXCONVERTER_MAKETX"] = shlex.join([sys.executable, os.path.join(_HERE, "fake_maketx.py")])
+
+BENCHMARKS = {}
+"""dict[str, callable]: Registered benchmarks by name."""
+
+
+def benchmark(function):
+    """Register benchmark.
+
+    A benchmark takes the parsed arguments and a temporary directory, prepares its data and returns a callable
+    that runs the timed part.
+
+    """
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def _make_sequences(root: str, directories: int, sequences: int, frames: int) -> None:
+    """Create synthetic texture tree with empty files.
+
+    Args:
+        root: Directory to create files in.
+        directories: Number of directories.
+        sequences: Image sequences per directory.
+        frames: Frames per sequence.
+
+    """
+    for directory in range(directories):
+        path = os.path.join(root, "asset{:04d}".format(directory), "textures")
+        os.makedirs(path)
+        for sequence in range(sequences):
+            for frame in range(1001, 1001 + frames):
+                open(os.path.join(path, "tex{:04d}.{:04d}.exr".format(sequence, frame)), "wb").close()
+
+
+def _make_elements(count: int, frames: int) -> list:
+    """Create elements without touching the file system.
+
+    Args:
+        count: Number of elements.
+        frames: Frames per element.
+
+    Returns:
+        Elements.
+
+    """
+    import PyImageSequence
+    from txConverter.elements import image_element
+
+    elements = []
+    for index in range(count):
+        sequence = PyImageSequence.ImageElement("/mock/textures/tex{:06d}.%04d.exr".format(index))
+        sequence.frames = list(range(1001, 1001 + frames))
+        elements.append(image_element.ReleasableImageElement(sequence))
+    return elements
+
+
+@benchmark
+def scan(args, temp_dir):
+    """Recursive scan of a synthetic texture tree."""
+    from txConverter import load_elements
+
+    directories = max(1, args.elements // args.sequences)
+    _make_sequences(temp_dir, directories, args.sequences, args.frames)
+    return lambda: sum(1 for _ in load_elements.get_elements(temp_dir, recursive=True))
+
+
+@benchmark
+def scan_cached(args, temp_dir):
+    """Recursive scan of an unchanged texture tree with a warm scan cache."""
+    from txConverter import load_elements
+    from txConverter import scan_cache
+
+    directories = max(1, args.elements // args.sequences)
+    _make_sequences(os.path.join(temp_dir, "tree"), directories, args.sequences, args.frames)
+    cache = scan_cache.ScanCache(os.path.join(temp_dir, "cache"))
+    for _ in load_elements.get_elements(os.path.join(temp_dir, "tree"), recursive=True, cache=cache):
+        pass
+    return lambda: sum(1 for _ in load_elements.get_elements(os.path.join(temp_dir, "tree"), True, cache=cache))
+
+
+@benchmark
+def elements(args, temp_dir):
+    """Create table rows for scanned sequences, run with --memory to measure their footprint."""
+    import PyImageSequence
+    from txConverter.elements import image_element
+
+    sequences = []
+    for index in range(args.elements):
+        sequence = PyImageSequence.ImageElement("/mock/textures/tex{:06d}.%04d.exr".format(index))
+        sequence.frames = list(range(1001, 1001 + args.frames))
+        sequences.append(sequence)
+    return lambda: [image_element.ReleasableImageElement(sequence) for sequence in sequences]
+
+
+@benchmark
+def command_list(args, temp_dir):
+    """Generate conversion commands for all elements."""
+    elements = _make_elements(args.elements, args.frames)
+    return lambda: sum(len(element.get_command_list()) for element in elements)
+
+
+@benchmark
+def command_stream(args, temp_dir):
+    """Stream conversion jobs for all elements without holding them in memory."""
+    from txConverter import convert as convert_module
+
+    elements = _make_elements(args.elements, args.frames)
+    return lambda: sum(1 for _ in convert_module.get_jobs(elements))
+
+
+def _get_model(args):
+    """Create table model inside a QApplication.
+
+    Args:
+        args: Parsed command line arguments, `--fetch-size` sets the page size of the table.
+
+    Returns:
+        Empty table model.
+
+    """
+    from Qt import QtWidgets
+    from txConverter.gui import model
+
+    model.FETCH_SIZE = args.fetch_size or sys.maxsize
+    _get_model.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    return model.TxTableModel()
+
+
+@benchmark
+def model_add(args, temp_dir):
+    """Add elements to the table model in scan sized batches."""
+    elements = _make_elements(args.elements, 1)
+    table_model = _get_model(args)
+
+    def run():
+        for start in range(0, len(elements), args.batch):
+            table_model.add_elements(elements[start : start + args.batch])
+
+    return run
+
+
+@benchmark
+def model_remove(args, temp_dir):
+    """Remove every other row of a table sorted by name descending, like deleting a selection in the view."""
+    from Qt import QtCore
+    from txConverter.gui import model
+
+    elements = _make_elements(args.elements, 1)
+    table_model = _get_model(args)
+    proxy_model = model.TxSortFilterModel()
+    proxy_model.setSourceModel(table_model)
+    table_model.add_elements(elements)
+    proxy_model.sort(model.NAME_COLUMN_INDEX, QtCore.Qt.DescendingOrder)
+    while proxy_model.canFetchMore():
+        proxy_model.fetchMore()  # Scrolled to the end, so every removed row is shown.
+    rows = [proxy_model.mapToSource(proxy_model.index(row, 0)).row() for row in range(0, proxy_model.rowCount(), 2)]
+    return lambda: table_model.remove_rows(rows)
+
+
+@benchmark
+def first_paint(args, temp_dir):
+    """Load scanned elements into the table widget and paint it once, run with --memory for its footprint."""
+    from Qt import QtWidgets
+    from txConverter.gui.widgets import tabel_widget
+
+    elements = _make_elements(args.elements, 1)
+    _get_model(args)
+
+    def run():
+        widget = tabel_widget.TxTableWidget()
+        widget.resize(1200, 800)
+        widget.show()
+        for start in range(0, len(elements), args.batch):
+            widget.model.add_elements(elements[start : start + args.batch])
+        QtWidgets.QApplication.processEvents()
+        widget.close()
+        return widget
+
+    return run
+
+
+@benchmark
+def model_data(args, temp_dir):
+    """Repaint a screen of rows through the sort proxy while scrolling over the whole table.
+
+    Like the table view, more rows are fetched from the proxy whenever the screen reaches the last fetched row.
+
+    """
+    from Qt import QtCore
+    from txConverter.gui import model
+
+    elements = _make_elements(args.elements, 1)
+    table_model = _get_model(args)
+    proxy_model = model.TxSortFilterModel()
+    proxy_model.setSourceModel(table_model)
+    table_model.add_elements(elements)
+    roles = (QtCore.Qt.DisplayRole, QtCore.Qt.CheckStateRole, QtCore.Qt.ToolTipRole, QtCore.Qt.ForegroundRole)
+    visible_rows = 50
+
+    def run():
+        first_row = 0
+        while first_row + visible_rows <= proxy_model.rowCount():
+            for row in range(first_row, first_row + visible_rows):
+                for column in range(proxy_model.columnCount()):
+                    index = proxy_model.index(row, column)
+                    for role in roles:
+                        proxy_model.data(index, role)
+            first_row += visible_rows // 2  # Scroll half a page.
+            if first_row + visible_rows > proxy_model.rowCount() and proxy_model.canFetchMore():
+                proxy_model.fetchMore()
+        proxy_model.sort(model.NAME_COLUMN_INDEX)
+
+    return run
+
+
+@benchmark
+def sort_filter(args, temp_dir):
+    """Add elements in scan sized batches to a table sorted by name, then re-sort it and filter it twice."""
+    from Qt import QtCore
+    from txConverter.gui import model
+
+    elements = _make_elements(args.elements, 1)
+    table_model = _get_model(args)
+    proxy_model = model.TxSortFilterModel()
+    proxy_model.setSourceModel(table_model)
+    proxy_model.sort(model.NAME_COLUMN_INDEX)
+
+    def run():
+        for start in range(0, len(elements), args.batch):
+            table_model.add_elements(elements[start : start + args.batch])
+        proxy_model.sort(model.NAME_COLUMN_INDEX, QtCore.Qt.DescendingOrder)
+        proxy_model.sort(model.OUTPUT_NAME_COLUMN_INDEX, QtCore.Qt.AscendingOrder)
+        proxy_model.set_filter("tex0001")
+        proxy_model.set_filter("*00[0-4]*")
+        proxy_model.set_filter("")
+
+    return run
+
+
+@benchmark
+def convert(args, temp_dir):
+    """End to end conversion of synthetic images with the fake maketx."""
+    from txConverter import convert as convert_module
+
+    jobs = []
+    for index in range(args.jobs):
+        path = os.path.join(temp_dir, "tex{:05d}.exr".format(index))
+        with open(path, "wb") as file_handle:
+            file_handle.write(b"\0" * args.job_size)
+        output_path = os.path.join(temp_dir, "tex{:05d}.tx".format(index))
+        argv = shlex.split(os.environ["TXCONVERTER_MAKETX"]) + [path, "-o", output_path]
+        jobs.append(convert_module.ConvertJob(argv, path, output_path))
+
+    engine = convert_module.ConvertEngine(workers=args.workers)
+    return lambda: engine.run(jobs)
+
+
+def run_benchmark(name: str, args: argparse.Namespace) -> dict:
+    """Prepare, time and measure memory of one benchmark.
+
+    Args:
+        name: Benchmark name.
+        args: Parsed command line arguments.
+
+    Returns:
+        Benchmark result.
+
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            function = BENCHMARKS[name](args, temp_dir)
+        except ImportError as error:
+            return {"skipped": str(error)}
+
+        start_time = time.perf_counter()
+        function()
+        result = {"seconds": time.perf_counter() - start_time}
+
+    if args.memory:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            function = BENCHMARKS[name](args, temp_dir)
+            tracemalloc.start()
+            function()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result
+
+
+def compare(results: dict, previous: dict, threshold: float) -> bool:
+    """Print comparison with previous results.
+
+    Args:
+        results: Current results.
+        previous: Results loaded from an earlier run.
+        threshold: Relative slowdown reported as regression.
+
+    Returns:
+        True if any benchmark regressed.
+
+    """
+    if previous.get("params") != results["params"]:
+        print("Warning: benchmark parameters differ from the compared results.")
+
+    regressed = False
+    for name, result in results["benchmarks"].items():
+        old = previous.get("benchmarks", {}).get(name, {})
+        for key in ("seconds", "peak_bytes"):
+            if key not in result or not old.get(key):
+                continue
+            change = result[key] / old[key] - 1
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressed = True
+            row = "{:<14} {:<10} {:>14.4f} {:>14.4f} {:>+8.1%}{}"
+            print(row.format(name, key, old[key], result[key], change, flag))
+    return regressed
+
+
+def main(argv: [str] = None) -> int:
+    """Run benchmarks.
+
+    Args:
+        argv (:obj: `list[str]`, optional): Command line arguments.
+
+    Returns:
+        Exit code, 1 if a benchmark regressed compared to `--compare`.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        metavar="BENCHMARK",
+        help="Benchmarks to run, all by default. One of: {}.".format(", ".join(sorted(BENCHMARKS))),
+    )
+    parser.add_argument("--elements", type=int, default=10000, help="Number of sequences or model rows.")
+    parser.add_argument("--sequences", type=int, default=20, help="Sequences per scanned directory.")
+    parser.add_argument("--frames", type=int, default=3, help="Frames per sequence.")
+    parser.add_argument("--batch", type=int, default=1000, help="Rows added to the model at once.")
+    parser.add_argument(
+        "--fetch-size", type=int, default=1000, help="Rows the table shows per page, 0 shows all rows at once."
+    )
+    parser.add_argument("--jobs", type=int, default=200, help="Number of conversion jobs.")
+    parser.add_argument("--job-size", type=int, default=64 * 1024, help="Size of converted images in bytes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Concurrent conversions.")
+    parser.add_argument("--memory", action="store_true", help="Measure peak python memory (runs twice).")
+    parser.add_argument("--output", help="Write results as JSON.")
+    parser.add_argument("--compare", help="Compare with results written by --output.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown reported as regression.")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmarks: {}".format(", ".join(unknown)))
+
+    params = {key: value for key, value in vars(args).items() if key not in ("benchmarks", "output", "compare")}
+    results = {"python": platform.python_version(), "params": params, "benchmarks": {}}
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        result = run_benchmark(name, args)
+        results["benchmarks"][name] = result
+        if "skipped" in result:
+            print("{:<14} skipped: {}".format(name, result["skipped"]))
+        else:
+            memory = " {:>12} bytes".format(result["peak_bytes"]) if "peak_bytes" in result else ""
+            print("{:<14} {:>10.4f}s{}".format(name, result["seconds"], memory))
+
+    if args.output:
+        with open(args.output, "w") as file_handle:
+            json.dump(results, file_handle, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file_handle:
+            return int(compare(results, json.load(file_handle), args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
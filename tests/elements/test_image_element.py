@@ -53,3 +53,47 @@ class TestReleasableImageElement(unittest.TestCase):
         expected_result = ["maketx -v /mock/file.exr -o /mock/file.tx"]
         self.assertEqual(e.get_command_list(), expected_result)
 
+    def test_iter_paths_renamed(self):
+        seq = PyImageSequence.ImageElement("/mock/file.%04d.exr")
+        seq.frames = [999, 1000]
+        e = image_element.ReleasableImageElement(seq)
+        e.output = "other"
+
+        expected_result = [
+            ("/mock/file.0999.exr", "/mock/other.0999.tx"),
+            ("/mock/file.1000.exr", "/mock/other.1000.tx"),
+        ]
+        self.assertEqual(list(e.iter_paths()), expected_result)
+        self.assertEqual(e.frame_count, 2)
+
+    def test_build_argv_path_with_spaces(self):
+        seq = PyImageSequence.ImageElement("/mock/my file.exr")
+        e = image_element.ReleasableImageElement(seq)
+
+        expected_result = ["maketx", "-v", "/mock/my file.exr", "-o", "/mock/my file.tx"]
+        self.assertEqual(e.build_argv("/mock/my file.exr", "/mock/my file.tx"), expected_result)
+        self.assertEqual(e.get_command_list(), ["maketx -v '/mock/my file.exr' -o '/mock/my file.tx'"])
+
+    def test_path_cache_follows_output_name(self):
+        seq = PyImageSequence.ImageElement("/mock/file.%04d.exr")
+        seq.frames = [1001]
+        e = image_element.ReleasableImageElement(seq)
+
+        self.assertEqual(e.get_path_list(), [("/mock/file.1001.exr", "/mock/file.1001.tx")])
+        e.output = "other"
+        self.assertEqual(e.get_path_list(), [("/mock/file.1001.exr", "/mock/other.1001.tx")])
+        seq.frames = [1001, 1002]
+        self.assertEqual(
+            e.get_path_list(),
+            [("/mock/file.1001.exr", "/mock/other.1001.tx"), ("/mock/file.1002.exr", "/mock/other.1002.tx")],
+        )
+
+    def test_output_element_derived_from_input(self):
+        seq = PyImageSequence.ImageElement("/mock/file.exr")
+        e = image_element.ReleasableImageElement(seq)
+        e.output = "other"
+
+        self.assertEqual(e.output_element.ext, ".tx")
+        self.assertEqual(e.output_element.name, "other")
+        self.assertEqual(seq.ext, ".exr")
+        self.assertFalse(hasattr(e, "__dict__"))
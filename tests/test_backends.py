@@ -0,0 +1,52 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import backends
+from txConverter import convert
+import unittest
+
+
+class TestGetBackend(unittest.TestCase):
+    def test_default(self):
+        self.assertIsInstance(backends.get_backend(), backends.MaketxBackend)
+
+    def test_maketx(self):
+        self.assertIsInstance(backends.get_backend("maketx"), backends.MaketxBackend)
+
+    @unittest.skipIf(backends.oiio_available(), "OpenImageIO is installed.")
+    def test_oiio_fallback(self):
+        self.assertIsInstance(backends.get_backend("oiio"), backends.MaketxBackend)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            backends.get_backend("mock")
+
+
+class TestMaketxBackend(unittest.TestCase):
+    def test_output_is_bounded_and_parsed(self):
+        script = "seq 1 100000; echo 'maketx run time (seconds):  1.5'; echo 'maketx memory used: 12.5 MB' >&2; exit 3"
+        job = convert.ConvertJob(["sh", "-c", script], "/mock/a.exr", "/mock/a.tx")
+        output = backends.JobOutput(max_lines=5)
+
+        self.assertEqual(backends.MaketxBackend().convert(job, output), 3)
+        self.assertEqual(output.lines, 100002)
+        self.assertEqual(len(output.tail), 5)
+        self.assertEqual(output.tail[-3], "100000")
+        self.assertEqual(output.stats, {"maketx_run_time": 1.5, "maketx_memory_used_mb": 12.5})
+
+    def test_failed_job_keeps_output(self):
+        job = convert.ConvertJob(["sh", "-c", "echo 'maketx ERROR: bad file' >&2; exit 1"], "/mock/a.exr", "/mock/a.tx")
+        result = convert.ConvertEngine(workers=1).run([job]).results[0]
+
+        self.assertEqual(result.output, "maketx ERROR: bad file")
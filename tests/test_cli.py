@@ -0,0 +1,46 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import cli
+import subprocess
+import sys
+import unittest
+
+
+class TestCli(unittest.TestCase):
+    def test_parse_args(self):
+        args = cli.parse_args(["--headless", "/mock/a", "/mock/b", "-g", "-o", "file=other", "-e", "*_bump", "-j", "3"])
+
+        self.assertEqual(args.directories, ["/mock/a", "/mock/b"])
+        self.assertTrue(args.gamma)
+        self.assertEqual(args.output_name, [("file", "other")])
+        self.assertEqual(args.exclude, ["*_bump"])
+        self.assertEqual(args.workers, 3)
+
+    def test_serve(self):
+        self.assertEqual(cli.parse_args(["/mock/a", "--serve", "8642"]).serve, ("127.0.0.1", 8642))
+        self.assertEqual(cli.parse_args(["/mock/a", "--serve", "0.0.0.0:8642"]).serve, ("0.0.0.0", 8642))
+        with self.assertRaises(SystemExit):
+            cli.parse_args(["/mock/a", "--serve", "8642", "--dedupe"])
+
+    def test_no_qt_import(self):
+        process = subprocess.run(
+            [sys.executable, "-c", "import sys, txConverter.cli; assert 'Qt' not in sys.modules"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        self.assertEqual(process.returncode, 0, process.stdout.decode())
+
+    def test_missing_directory(self):
+        self.assertEqual(cli.main(["/mock/does/not/exist"]), 1)
@@ -0,0 +1,128 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import convert
+from txConverter import estimate
+from txConverter import manifest
+import os
+import tempfile
+import unittest
+
+
+class TestConvertEngine(unittest.TestCase):
+    def test_run_all_success(self):
+        jobs = [
+            convert.ConvertJob(["true"], "/mock/in.{}.exr".format(i), "/mock/out.{}.tx".format(i))
+            for i in range(8)
+        ]
+        summary = convert.ConvertEngine(workers=4).run(jobs)
+
+        self.assertTrue(summary.success)
+        self.assertEqual(summary.converted, 8)
+
+    def test_run_reports_failure_in_any_order(self):
+        jobs = [
+            convert.ConvertJob(["sh", "-c", "sleep 0.2; false"], "/mock/a.exr", "/mock/a.tx"),
+            convert.ConvertJob(["true"], "/mock/b.exr", "/mock/b.tx"),
+        ]
+        reported = []
+        summary = convert.ConvertEngine(workers=2, callback=reported.append).run(jobs)
+
+        self.assertFalse(summary.success)
+        self.assertEqual(summary.failed, 1)
+        self.assertEqual([result.job.input_path for result in reported], ["/mock/b.exr", "/mock/a.exr"])
+
+    def test_run_reads_jobs_in_windows(self):
+        generated = []
+
+        def get_jobs():
+            for index in range(10):
+                generated.append(index)
+                yield convert.ConvertJob(["true"], "/mock/in.{}.exr".format(index), "/mock/out.{}.tx".format(index))
+
+        generated_at_first_result = []
+        engine = convert.ConvertEngine(
+            workers=1, window=2, callback=lambda result: generated_at_first_result.append(len(generated))
+        )
+        summary = engine.run(get_jobs())
+
+        self.assertEqual(summary.converted, 10)
+        self.assertEqual(generated_at_first_result[0], 2)
+
+    def test_run_writes_manifest_only_when_incremental(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "a.exr")
+            open(path, "w").close()
+            job = convert.ConvertJob(["touch", path + ".tx"], path, path + ".tx")
+            convert.ConvertEngine(workers=1).run([job])
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, manifest.MANIFEST_NAME)))
+
+            convert.ConvertEngine(workers=1, incremental=True).run([job])
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, manifest.MANIFEST_NAME)))
+
+    def test_run_path_with_spaces(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "my file.exr")
+            open(path, "w").close()
+            job = convert.ConvertJob(["test", "-f", path], path, path + ".tx")
+
+            self.assertTrue(job.command.endswith("'{}'".format(path)))
+            self.assertTrue(convert.ConvertEngine(workers=1).run([job]).success)
+
+    def test_run_missing_executable(self):
+        job = convert.ConvertJob(["/mock/maketx"], "/mock/a.exr", "/mock/a.tx")
+
+        self.assertFalse(convert.ConvertEngine(workers=1).run([job]).success)
+
+    def test_run_memory_budget(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lock_dir = os.path.join(temp_dir, "lock")
+            jobs = []
+            for index, size in enumerate((1000, 1000, 1000, 1, 1)):
+                path = os.path.join(temp_dir, "{}.exr".format(index))
+                with open(path, "wb") as file_handle:
+                    file_handle.write(b"x" * size)
+                if size > 1:  # Large jobs fail if they run at the same time.
+                    argv = ["sh", "-c", "mkdir {0} && sleep 0.1 && rmdir {0}".format(lock_dir)]
+                else:
+                    argv = ["true"]
+                jobs.append(convert.ConvertJob(argv, path, path + ".tx"))
+
+            memory_budget = int(1500 * estimate.UNCOMPRESSED_RATIO * estimate.MIP_OVERHEAD)
+            engine = convert.ConvertEngine(workers=4, memory_budget=memory_budget)
+            summary = engine.run(jobs)
+
+        self.assertTrue(summary.success)
+        self.assertEqual(summary.converted, 5)
+
+    def test_run_scratch_dir(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            scratch_dir = os.path.join(temp_dir, "scratch")
+            jobs = []
+            for name in ("a", "b", "c"):
+                path = os.path.join(temp_dir, name + ".exr")
+                with open(path, "wb") as file_handle:
+                    file_handle.write(name.encode())
+                jobs.append(convert.ConvertJob(["cp", path, path + ".tx"], path, path + ".tx"))
+            jobs.append(convert.ConvertJob(["false", "/mock/d.tx"], "/mock/d.exr", "/mock/d.tx"))
+
+            engine = convert.ConvertEngine(workers=2, scratch_dir=scratch_dir, upload_workers=1)
+            summary = engine.run(jobs)
+
+            self.assertEqual(summary.converted, 3)
+            self.assertEqual(summary.failed, 1)
+            with open(jobs[1].output_path, "rb") as file_handle:
+                self.assertEqual(file_handle.read(), b"b")
+            self.assertEqual(os.listdir(scratch_dir), [])
+            self.assertEqual(sorted(name for name in os.listdir(temp_dir) if name.endswith(".tmp")), [])
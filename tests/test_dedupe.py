@@ -0,0 +1,66 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import convert
+from txConverter import dedupe
+import os
+import tempfile
+import unittest
+
+
+class TestDedupe(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original = self._write("original.exr", b"pixels")
+        self.hardlink = os.path.join(self.temp_dir.name, "hardlink.exr")
+        os.link(self.original, self.hardlink)
+        self.symlink = os.path.join(self.temp_dir.name, "symlink.exr")
+        os.symlink(self.original, self.symlink)
+        self.copy = self._write("copy.exr", b"pixels")
+        self.other = self._write("other.exr", b"other!")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "wb") as file_handle:
+            file_handle.write(content)
+        return path
+
+    def _job(self, path, options=None):
+        output = os.path.splitext(path)[0] + ".tx"
+        return convert.ConvertJob(["cp", path, output], path, output, options)
+
+    def test_group_jobs(self):
+        jobs = [self._job(path) for path in (self.original, self.hardlink, self.symlink, self.copy, self.other)]
+        primaries, copies = dedupe.group_jobs(jobs)
+
+        self.assertEqual([job.input_path for job in primaries], [self.original, self.other])
+        self.assertEqual(len(copies[primaries[0]]), 3)
+
+    def test_group_jobs_options(self):
+        primaries, copies = dedupe.group_jobs([self._job(self.original), self._job(self.copy, ["--colorconvert"])])
+
+        self.assertEqual(len(primaries), 2)
+        self.assertEqual(copies, {})
+
+    def test_run(self):
+        jobs = [self._job(path) for path in (self.original, self.hardlink, self.copy)]
+        summary = convert.ConvertEngine(workers=2, deduplicate=True).run(jobs)
+
+        self.assertEqual(summary.converted, 3)
+        for job in jobs:
+            with open(job.output_path, "rb") as file_handle:
+                self.assertEqual(file_handle.read(), b"pixels")
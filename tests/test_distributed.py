@@ -0,0 +1,120 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import convert
+from txConverter import distributed
+import threading
+import unittest
+from urllib import error
+from urllib import request
+
+# Fails for inputs containing "bad", the arguments are: -v input [options] -o output.
+FAKE_MAKETX = ["sh", "-c", 'case "$2" in *bad*) exit 1;; esac', "maketx"]
+
+
+class TestDistributed(unittest.TestCase):
+    def _start_workers(self, url, count, results=None):
+        threads = []
+        for index in range(count):
+            worker = distributed.Worker(url, name="worker{}".format(index), poll_interval=0.05, maketx=FAKE_MAKETX)
+
+            def run(worker=worker):
+                success = worker.run(2)
+                if results is not None:
+                    results.append(success)
+
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def test_workers_convert_all_jobs(self):
+        jobs = [
+            convert.ConvertJob(["false"], "/mock/in.{}.exr".format(i), "/mock/out.{}.tx".format(i)) for i in range(10)
+        ]
+        jobs.append(convert.ConvertJob(["true"], "/mock/bad.exr", "/mock/bad.tx"))
+        coordinator = distributed.Coordinator(jobs, port=0)
+        results = []
+        workers = self._start_workers(coordinator.url, 3, results)
+
+        summary = coordinator.serve()
+        for thread in workers:
+            thread.join(5)
+
+        self.assertEqual(summary.converted, 10)
+        self.assertEqual(summary.failed, 1)
+        self.assertFalse(any(thread.is_alive() for thread in workers))
+        self.assertEqual(sorted(results), [False, True, True])
+
+    def test_lease_has_no_command(self):
+        job = convert.ConvertJob(["rm", "-rf", "/mock"], "/mock/in.exr", "/mock/out.tx", ["--colorconvert"])
+        coordinator = distributed.Coordinator([job], port=0)
+
+        lease = coordinator.lease({"worker": "mock"})
+
+        self.assertTrue(coordinator.url.startswith("http://127.0.0.1:"))
+        expected_result = {"input": "/mock/in.exr", "output": "/mock/out.tx", "options": ["--colorconvert"]}
+        self.assertEqual(lease["job"], expected_result)
+
+    def test_reject_request_that_is_not_an_object(self):
+        coordinator = distributed.Coordinator([], port=0)
+        thread = threading.Thread(target=coordinator._server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            for body in (b"[]", b'"lease"'):
+                with self.assertRaises(error.HTTPError) as context:
+                    request.urlopen(request.Request(coordinator.url + "/lease", body), timeout=5)
+                self.assertEqual(context.exception.code, 400)
+        finally:
+            coordinator._server.shutdown()
+            coordinator._server.server_close()
+
+    def test_worker_builds_command(self):
+        worker = distributed.Worker("http://127.0.0.1:0", maketx=["/mock/maketx"])
+
+        job = worker._get_job({"input": "/mock/in.exr", "output": "/mock/out.tx", "options": []})
+
+        self.assertEqual(job.argv, ["/mock/maketx", "-v", "/mock/in.exr", "-o", "/mock/out.tx"])
+        for data in (
+            {"input": "-o/etc/passwd", "output": "/mock/out.tx", "options": []},
+            {"input": "/mock/in.exr", "output": "out.tx", "options": []},
+            {"input": "/mock/in.exr", "output": "/mock/out.tx", "options": ["-o", "/etc/passwd"]},
+        ):
+            with self.assertRaises(ValueError):
+                worker._get_job(data)
+
+    def test_expired_lease_is_queued_again(self):
+        job = convert.ConvertJob(["true"], "/mock/in.exr", "/mock/out.tx")
+        coordinator = distributed.Coordinator([job], port=0, lease_time=0.2)
+        lost_lease = coordinator.lease({"worker": "crashed"})
+        self._start_workers(coordinator.url, 1)
+
+        summary = coordinator.serve()
+
+        self.assertTrue(summary.success)
+        self.assertIsNone(coordinator.report({"lease": lost_lease["lease"], "exit_status": 0}))
+        self.assertNotEqual(summary.results[0].worker, "crashed")
+
+    def test_give_up_after_max_attempts(self):
+        job = convert.ConvertJob(["true"], "/mock/in.exr", "/mock/out.tx")
+        coordinator = distributed.Coordinator([job], port=0, lease_time=0.05, max_attempts=1)
+        coordinator.lease({"worker": "crashed"})
+
+        summary = coordinator.serve()
+
+        self.assertFalse(summary.success)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import convert
+from txConverter import estimate
+import os
+import struct
+import tempfile
+import unittest
+
+
+class TestEstimate(unittest.TestCase):
+    def test_largest_first(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jobs = []
+            for size in (10, 300, 0, 20):
+                path = os.path.join(temp_dir, "{}.exr".format(size))
+                with open(path, "wb") as file_handle:
+                    file_handle.write(b"x" * size)
+                jobs.append(convert.ConvertJob(["true"], path, path + ".tx"))
+            jobs.append(convert.ConvertJob(["true"], "/mock/missing.exr", "/mock/missing.tx"))
+
+            ordered, costs = estimate.largest_first(jobs)
+
+        self.assertEqual(costs, [300, 20, 10, 0, 0])
+        self.assertEqual(os.path.basename(ordered[0].input_path), "300.exr")
+
+    def test_predict_run_time(self):
+        self.assertEqual(estimate.predict_run_time([4, 3, 3, 2], workers=2, bytes_per_second=1), 6)
+        self.assertEqual(estimate.predict_run_time([4, 3], workers=8, bytes_per_second=1), 4)
+        self.assertEqual(estimate.predict_run_time([], workers=2), 0)
+
+    def test_predict_run_time_continued(self):
+        finish_times = [0.0, 0.0]
+        estimate.predict_run_time([4, 3], workers=2, bytes_per_second=1, finish_times=finish_times)
+        self.assertEqual(estimate.predict_run_time([3, 2], workers=2, bytes_per_second=1, finish_times=finish_times), 6)
+
+    def test_job_memory_exr(self):
+        channel = struct.pack("<i", 1) + b"\0" * 4 + struct.pack("<2i", 1, 1)  # Half float.
+        channels = b"".join(name + b"\0" + channel for name in (b"B", b"G", b"R"))
+        header = struct.pack("<2i", 20000630, 2)
+        header += b"channels\0chlist\0" + struct.pack("<i", len(channels) + 1) + channels + b"\0"
+        header += b"dataWindow\0box2i\0" + struct.pack("<i", 16) + struct.pack("<4i", 0, 0, 1023, 511)
+        header += b"\0"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "file.exr")
+            with open(path, "wb") as file_handle:
+                file_handle.write(header)
+
+            memory = estimate.job_memory(convert.ConvertJob(["true"], path, "/mock/file.tx"))
+
+        self.assertEqual(memory, int(1024 * 512 * 3 * 2 * estimate.MIP_OVERHEAD))
+
+    def test_job_memory_truncated_exr(self):
+        header = struct.pack("<2i", 20000630, 2) + b"channels\0chlist\0" + struct.pack("<i", 1000)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "file.exr")
+            with open(path, "wb") as file_handle:
+                file_handle.write(header)
+
+            memory = estimate.job_memory(convert.ConvertJob(["true"], path, "/mock/file.tx"))
+
+        self.assertEqual(memory, int(len(header) * estimate.UNCOMPRESSED_RATIO * estimate.MIP_OVERHEAD))
@@ -0,0 +1,130 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import convert
+from txConverter import journal
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.temp_dir = self._temp_dir.name
+        self.journal_path = os.path.join(self.temp_dir, "run.jsonl")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _job(self, name):
+        output_path = os.path.join(self.temp_dir, name + ".tx")
+        return convert.ConvertJob(["true"], os.path.join(self.temp_dir, name + ".exr"), output_path, ["-v"])
+
+    def _write_output(self, job, data=b"tx"):
+        with open(job.output_path, "wb") as file_handle:
+            file_handle.write(data)
+
+    def test_load_unfinished_after_crash(self):
+        done, changed, started, failed, waiting = [self._job(name) for name in "abcde"]
+        run_journal = journal.Journal(self.journal_path)
+        run_journal.planned([done, changed, started, failed, waiting])
+        for job in (done, changed, started, failed):
+            run_journal.started(job)
+            self._write_output(job)
+        run_journal.finished(convert.JobResult(done, True, 0))
+        run_journal.finished(convert.JobResult(changed, True, 0))
+        run_journal.finished(convert.JobResult(failed, False, 1))
+        run_journal.close()
+        self._write_output(changed, b"truncated tx")
+        with open(self.journal_path, "a") as file_handle:
+            file_handle.write('{"event": "do')  # Record cut off by the crash.
+
+        jobs = convert.load_unfinished_jobs(journal.InterruptedRuns(self.temp_dir))
+
+        self.assertEqual(
+            sorted(job.output_path for job in jobs),
+            [changed.output_path, started.output_path, failed.output_path, waiting.output_path],
+        )
+        self.assertEqual(jobs[0].argv, ["true"])
+        self.assertEqual(jobs[0].options, ["-v"])
+        self.assertFalse(os.path.exists(started.output_path))
+        self.assertTrue(os.path.exists(failed.output_path))
+
+    def test_engine_removes_journal_of_completed_run(self):
+        engine = convert.ConvertEngine(workers=2, journal_path=self.journal_path)
+        summary = engine.run([self._job("a"), self._job("b")])
+
+        self.assertTrue(summary.success)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_engine_keeps_journal_of_interrupted_run(self):
+        def interrupt(result):
+            raise KeyboardInterrupt
+
+        job = self._job("a")
+        job.argv = ["touch", job.output_path]
+        engine = convert.ConvertEngine(workers=1, journal_path=self.journal_path, callback=interrupt)
+        with self.assertRaises(KeyboardInterrupt):
+            engine.run([job])
+
+        self.assertEqual(convert.load_unfinished_jobs(journal.InterruptedRuns(self.temp_dir)), [])
+
+    def test_engine_records_all_jobs_before_converting(self):
+        recorded = []
+
+        def record(result):
+            recorded.append(len(journal.load_unfinished(self.journal_path)))
+
+        jobs = [self._job(name) for name in "abcde"]
+        engine = convert.ConvertEngine(workers=1, journal_path=self.journal_path, window=2, callback=record)
+        self.assertEqual(engine.run(iter(jobs)).converted, 5)
+        self.assertEqual(recorded[0], 5)  # All jobs are recorded, "true" writes no output so none is done.
+
+    def test_new_journal_path_is_unique(self):
+        with mock.patch.dict(os.environ, TXCONVERTER_CACHE_DIR=self.temp_dir):
+            self.assertNotEqual(journal.new_journal_path(), journal.new_journal_path())
+
+    def test_running_journal_is_not_interrupted(self):
+        run_journal = journal.Journal(self.journal_path)
+        run_journal.planned([self._job("a")])
+
+        self.assertEqual(journal.find_interrupted(self.temp_dir), [])
+        with self.assertRaises(OSError):
+            journal.Journal(self.journal_path)
+
+        run_journal.close()
+        self.assertEqual(journal.find_interrupted(self.temp_dir), [self.journal_path])
+
+    def test_resume_merges_runs_and_removes_journals(self):
+        for name, jobs in (("run1.jsonl", "ab"), ("run2.jsonl", "bc")):
+            run_journal = journal.Journal(os.path.join(self.temp_dir, name))
+            run_journal.planned([self._job(job_name) for job_name in jobs])
+            run_journal.close()
+
+        interrupted = journal.InterruptedRuns(self.temp_dir)
+        jobs = convert.load_unfinished_jobs(interrupted)
+        self.assertEqual(sorted(os.path.basename(job.output_path) for job in jobs), ["a.tx", "b.tx", "c.tx"])
+        self.assertEqual(len(journal.InterruptedRuns(self.temp_dir)), 0)  # Locked while resuming.
+
+        new_journal_path = os.path.join(self.temp_dir, "new", "run.jsonl")
+        os.mkdir(os.path.dirname(new_journal_path))
+        engine = convert.ConvertEngine(workers=2, journal_path=new_journal_path, resumed_runs=interrupted)
+        self.assertTrue(engine.run(jobs).success)
+        self.assertEqual(journal.find_interrupted(self.temp_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
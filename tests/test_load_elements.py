@@ -0,0 +1,42 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import load_elements
+import os
+import PyImageSequence as pySeq
+import tempfile
+import unittest
+
+
+class TestScanDirectory(unittest.TestCase):
+    def test_scan_directory_matches_library(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.mkdir(os.path.join(temp_dir, "sub"))
+            names = ("file.1002.exr", "file.1001.exr", "asset_v002.exr", "file.1001.tx", "notes.txt", ".hidden.exr")
+            for name in names:
+                open(os.path.join(temp_dir, name), "w").close()
+
+            result = load_elements._scan_directory(temp_dir)
+            expected = list(pySeq.scandir(path=temp_dir))
+
+        self.assertEqual(result.directories, [os.path.join(temp_dir, "sub")])
+        self.assertEqual(result.files, len(names))
+        self.assertEqual(
+            [(sequence.getFilePath(), list(sequence.frames)) for sequence in result.sequences],
+            [(sequence.getFilePath(), list(sequence.frames)) for sequence in expected],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
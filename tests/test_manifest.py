@@ -0,0 +1,63 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import convert
+from txConverter import manifest
+import os
+import tempfile
+import unittest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "file.exr")
+        self.output = os.path.join(self.temp_dir.name, "file.tx")
+        with open(self.source, "wb") as file_handle:
+            file_handle.write(b"source")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _job(self, options=None):
+        return convert.ConvertJob(["cp", self.source, self.output], self.source, self.output, options)
+
+    def test_skip_unchanged(self):
+        first = convert.ConvertEngine(workers=1, incremental=True).run([self._job()])
+        second = convert.ConvertEngine(workers=1, incremental=True).run([self._job()])
+
+        self.assertEqual((first.converted, first.skipped), (1, 0))
+        self.assertEqual((second.converted, second.skipped), (0, 1))
+
+    def test_options_changed(self):
+        convert.ConvertEngine(workers=1, incremental=True).run([self._job()])
+        job = self._job(["--colorconvert", "sRGB", "linear"])
+        summary = convert.ConvertEngine(workers=1, incremental=True).run([job])
+
+        self.assertEqual(summary.converted, 1)
+
+    def test_source_changed(self):
+        convert.ConvertEngine(workers=1, incremental=True).run([self._job()])
+        with open(self.source, "wb") as file_handle:
+            file_handle.write(b"new source")
+
+        self.assertFalse(manifest.Manifest(self.temp_dir.name).is_up_to_date(self._job()))
+
+    def test_touched_source_with_hash(self):
+        convert.ConvertEngine(workers=1, incremental=True, hash_content=True).run([self._job()])
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertFalse(manifest.Manifest(self.temp_dir.name).is_up_to_date(self._job()))
+        self.assertTrue(manifest.Manifest(self.temp_dir.name).is_up_to_date(self._job(), hash_content=True))
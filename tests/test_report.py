@@ -0,0 +1,64 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import convert
+from txConverter import report
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+class TestReport(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(report.percentile([5, 1, 4, 2, 3], 0.5), 3)
+        self.assertEqual(report.percentile(list(range(1, 101)), 0.95), 95)
+        self.assertEqual(report.percentile([], 0.95), 0)
+
+    def test_run_report(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = os.path.join(temp_dir, "file.exr")
+            with open(source, "wb") as file_handle:
+                file_handle.write(b"x" * 100)
+            jobs = [
+                convert.ConvertJob(["cp", source, source + ".tx"], source, source + ".tx"),
+                convert.ConvertJob(["sh", "-c", "exit 3"], "/mock/a.exr", "/mock/a.tx"),
+            ]
+            report_path = os.path.join(temp_dir, "report.json")
+            reported = []
+            engine = convert.ConvertEngine(
+                workers=2, report_path=report_path, finished_callback=reported.append
+            )
+            engine.run(jobs)
+            with open(report_path) as file_handle:
+                data = json.load(file_handle)
+
+        self.assertEqual(data, reported[0])
+        self.assertEqual((data["converted"], data["failed"]), (1, 1))
+        self.assertEqual(data["input_bytes"], 100)
+        self.assertEqual(sorted(job["exit_status"] for job in data["jobs"]), [0, 3])
+        self.assertTrue(all(job["worker"] in ("convert0", "convert1") for job in data["jobs"]))
+
+    def test_default_report_path_prunes_old_reports(self):
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch.dict(os.environ, TXCONVERTER_CACHE_DIR=temp_dir):
+            reports_dir = os.path.dirname(report.default_report_path())
+            for index in range(5):
+                open(os.path.join(reports_dir, "run-2020010{}.json".format(index)), "w").close()
+
+            path = report.default_report_path(keep=3)
+            remaining = sorted(os.listdir(reports_dir))
+
+        self.assertEqual(remaining, ["run-20200103.json", "run-20200104.json"])
+        self.assertNotIn(os.path.basename(path), remaining)
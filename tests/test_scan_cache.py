@@ -0,0 +1,62 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import scan_cache
+import PyImageSequence
+import os
+import tempfile
+import unittest
+
+
+class TestScanCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = scan_cache.ScanCache(os.path.join(self.temp_dir.name, "cache"), max_bytes=10 * 1024)
+        self.scanned_dir = os.path.join(self.temp_dir.name, "textures")
+        os.makedirs(self.scanned_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _result(self):
+        seq = PyImageSequence.ImageElement("/mock/file.%04d.exr")
+        seq.frames = [1001, 1002]
+        return scan_cache.ScanResult([seq], ["/mock/sub"], 2)
+
+    def test_get_unchanged(self):
+        self.cache.put(self.scanned_dir, os.stat(self.scanned_dir), self._result())
+        result = self.cache.get(self.scanned_dir, os.stat(self.scanned_dir))
+
+        self.assertEqual(result.directories, ["/mock/sub"])
+        self.assertEqual(result.files, 2)
+        self.assertEqual(list(result.sequences[0].frames), [1001, 1002])
+
+    def test_get_changed(self):
+        self.cache.put(self.scanned_dir, os.stat(self.scanned_dir), self._result())
+        stat = os.stat(self.scanned_dir)
+        os.utime(self.scanned_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertIsNone(self.cache.get(self.scanned_dir, os.stat(self.scanned_dir)))
+
+    def test_replace_entry_keeps_size(self):
+        for _ in range(3):
+            self.cache.put(self.scanned_dir, os.stat(self.scanned_dir), self._result())
+
+        self.assertEqual(self.cache._size, self.cache._disk_usage())
+
+    def test_eviction(self):
+        for index in range(200):
+            self.cache.put("/mock/dir{}".format(index), os.stat(self.scanned_dir), self._result())
+
+        self.assertLessEqual(self.cache._disk_usage(), self.cache.max_bytes)
@@ -0,0 +1,76 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from txConverter import watch
+import os
+import tempfile
+import time
+import unittest
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.temp_dir = self._temp_dir.name
+        self.watcher = watch.Watcher([self.temp_dir], settle_time=0.2, rescan_interval=0)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _write(self, path, data=b"exr"):
+        with open(path, "wb") as file_handle:
+            file_handle.write(data)
+
+    def test_new_file_settles_before_it_is_ready(self):
+        sub_directory = os.path.join(self.temp_dir, "textures")
+        os.makedirs(sub_directory)
+        path = os.path.join(sub_directory, "file.1001.exr")
+        self._write(path)
+        self._write(os.path.join(sub_directory, "file.1001.tx"))
+
+        self.assertEqual(self.watcher.poll(), {})
+        time.sleep(0.3)
+        self.assertEqual(self.watcher.poll(), {sub_directory: {path}})
+        self.assertEqual(self.watcher.poll(), {})
+
+    def test_growing_file_is_not_ready(self):
+        path = os.path.join(self.temp_dir, "file.exr")
+        self._write(path)
+        self.watcher.poll()
+        time.sleep(0.3)
+        self._write(path, b"exr with more data")
+
+        self.assertEqual(self.watcher.poll(), {})
+        time.sleep(0.3)
+        self.assertEqual(self.watcher.poll(), {self.temp_dir: {path}})
+
+    def test_file_overwritten_in_place_found_by_rescan(self):
+        path = os.path.join(self.temp_dir, "file.exr")
+        self._write(path)
+        self.watcher.poll()
+        time.sleep(0.3)
+        self.watcher.poll()
+        with open(path, "r+b") as file_handle:
+            file_handle.write(b"EXR")
+        os.utime(path, ns=(0, 0))
+
+        self.watcher.rescan_interval = 0.01
+        time.sleep(0.3)
+        self.watcher.poll()
+        time.sleep(0.3)
+        self.assertEqual(self.watcher.poll(), {self.temp_dir: {path}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,339 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Conversion backends used by the conversion engine to turn one image into a tx file."""
+
+# IMPORT STANDARD LIBRARIES
+import collections
+from concurrent import futures
+import importlib.util
+import os
+import re
+import shlex
+import subprocess
+
+# IMPORT LOCAL LIBRARIES
+from txConverter.log import LOG
+
+
+MAKETX_COMMAND = shlex.split(os.getenv("TXCONVERTER_MAKETX", "maketx"))
+"""list[str]: maketx executable, can be overridden with the environment variable `TXCONVERTER_MAKETX`."""
+
+COLOR_CONVERT_OPTIONS = ["--colorconvert", "sRGB", "linear"]
+"""list[str]: maketx options converting colors from sRGB to linear."""
+
+DEFAULT_BACKEND = "maketx"
+"""str: Backend used unless another one is requested, runs the same maketx executable as the printed commands."""
+
+TAIL_LINES = 40
+"""int: Number of output lines kept per job."""
+
+MAX_LINE_LENGTH = 1000
+"""int: Output lines are cut to this length."""
+
+_STAT_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z /-]*?)\s*(?:\(seconds\))?:\s+([0-9]+(?:\.[0-9]+)?)\s*(MB)?\s*$")
+"""re.Pattern: Timing and memory lines of maketx -v, e.g. "maketx run time (seconds):  1.234"."""
+
+
+def build_argv(input_path: str, output_path: str, options: [str] = (), executable: [str] = None) -> [str]:
+    """Build maketx command as an argument vector that can be executed without a shell.
+
+    Args:
+        input_path: Source file path.
+        output_path: Destination file path.
+        options: maketx options affecting the output.
+        executable (:obj: `list[str]`, optional): maketx executable, defaults to `MAKETX_COMMAND`.
+
+    Returns:
+        Arguments for converting image to tx file.
+
+    """
+    command = list(MAKETX_COMMAND if executable is None else executable)  # Name of executable.
+    command.append("-v")  # Verbose mode.
+    command.append(input_path)  # File to convert.
+    command.extend(options)
+    command.extend(["-o", output_path])
+    return command
+
+
+def oiio_available() -> bool:
+    """Check if the OpenImageIO python bindings are installed.
+
+    Returns:
+        True if OpenImageIO can be imported.
+
+    """
+    return importlib.util.find_spec("OpenImageIO") is not None
+
+
+class JobOutput(object):
+    """Bounded capture of the output of one conversion.
+
+    Only the last lines are kept, timing and memory lines are parsed into `stats` as they arrive.
+
+    Attributes:
+        tail (collections.deque): Last output lines.
+        stats (dict[str, float]): Parsed statistics, e.g. "maketx_run_time" or "maketx_memory_used_mb".
+        lines (int): Total number of output lines.
+
+    """
+
+    def __init__(self, max_lines: int = TAIL_LINES) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            max_lines: Number of output lines to keep.
+
+        """
+        super(JobOutput, self).__init__()
+        self.tail = collections.deque(maxlen=max_lines)
+        self.stats = {}
+        self.lines = 0
+
+    def feed(self, line: str) -> None:
+        """Add output line.
+
+        Args:
+            line: Line of output.
+
+        """
+        line = line.rstrip()[:MAX_LINE_LENGTH]
+        self.lines += 1
+        self.tail.append(line)
+        match = _STAT_PATTERN.match(line)
+        if match:
+            name, value, unit = match.groups()
+            key = "_".join(name.lower().replace("-", " ").split())
+            self.stats[key + "_mb" if unit else key] = float(value)
+
+    @property
+    def text(self) -> str:
+        """str: Kept output lines."""
+        return "\n".join(self.tail)
+
+
+class Backend(object):
+    """Base class for conversion backends.
+
+    Attributes:
+        name (str): Name used to select the backend.
+
+    """
+
+    name = ""
+
+    def start(self, workers: int) -> None:
+        """Prepare backend for a conversion run.
+
+        Args:
+            workers: Number of jobs that will be converted at the same time.
+
+        """
+
+    def describe(self, job) -> str:
+        """Describe how a job is converted, used in error messages.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to describe.
+
+        Returns:
+            Printable description.
+
+        """
+        return '"{}"'.format(job.input_path)
+
+    def convert(self, job, output: JobOutput = None) -> int:
+        """Convert image. Called from multiple threads at the same time.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to convert.
+            output (:obj: `JobOutput`, optional): Capture of the conversion output.
+
+        Returns:
+            Exit status, 0 if the image was converted.
+
+        """
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Release resources after a conversion run."""
+
+
+class MaketxBackend(Backend):
+    """Convert images by running a maketx process per job."""
+
+    name = "maketx"
+
+    def describe(self, job) -> str:
+        """Describe how a job is converted, used in error messages.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to describe.
+
+        Returns:
+            Printable maketx command.
+
+        """
+        return 'command: "{}"'.format(job.command)
+
+    def convert(self, job, output: JobOutput = None) -> int:
+        """Run maketx command of job.
+
+        stdout and stderr are merged into one pipe that is read line by line while maketx runs, so parallel jobs
+        don't interleave on the terminal and a chatty process never blocks on a full pipe.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to convert.
+            output (:obj: `JobOutput`, optional): Capture of the maketx output.
+
+        Returns:
+            Exit status of maketx.
+
+        """
+        output = output or JobOutput()
+        try:
+            process = subprocess.Popen(
+                job.argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace"
+            )
+        except OSError as error:
+            output.feed(str(error))
+            return 127  # Same as a shell reporting a missing executable.
+
+        with process:
+            for line in process.stdout:
+                output.feed(line)
+        return process.returncode
+
+
+def _make_texture(input_path: str, output_path: str, options: [str]) -> (bool, str):
+    """Convert image with OpenImageIO in a worker process.
+
+    Args:
+        input_path: Source file path.
+        output_path: Destination file path.
+        options: maketx options to translate into make_texture settings.
+
+    Returns:
+        True if the image was converted and the error message otherwise.
+
+    """
+    import OpenImageIO
+
+    config = OpenImageIO.ImageSpec()
+    if "--colorconvert" in options:
+        index = options.index("--colorconvert")
+        config.attribute("maketx:incolorspace", options[index + 1])
+        config.attribute("maketx:outcolorspace", options[index + 2])
+
+    success = OpenImageIO.ImageBufAlgo.make_texture(OpenImageIO.MakeTxTexture, input_path, output_path, config)
+    return success, "" if success else OpenImageIO.geterror()
+
+
+class OiioBackend(Backend):
+    """Convert images in-process with OpenImageIO's make_texture.
+
+    Jobs run in a pool of worker processes that stay alive for the whole run, so plugins, color configuration
+    and the shared image cache are only loaded once per worker instead of once per frame. The job's maketx command
+    is not used, so verbose output and the `TXCONVERTER_MAKETX` override don't apply to this backend.
+
+    """
+
+    name = "oiio"
+
+    def describe(self, job) -> str:
+        """Describe how a job is converted, used in error messages.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to describe.
+
+        Returns:
+            Printable make_texture call.
+
+        """
+        return 'OpenImageIO make_texture of "{}"'.format(job.input_path)
+
+    def __init__(self) -> None:
+        """Initialize class and do nothing."""
+        super(OiioBackend, self).__init__()
+        self._pool = None
+
+    def start(self, workers: int) -> None:
+        """Start worker processes.
+
+        Args:
+            workers: Number of worker processes.
+
+        """
+        self._pool = futures.ProcessPoolExecutor(max_workers=workers)
+
+    def convert(self, job, output: JobOutput = None) -> int:
+        """Convert image in a worker process.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to convert.
+            output (:obj: `JobOutput`, optional): Capture of the error message.
+
+        Returns:
+            Exit status, 0 if the image was converted.
+
+        """
+        output = output or JobOutput()
+        try:
+            success, error = self._pool.submit(_make_texture, job.input_path, job.output_path, job.options).result()
+        except Exception as error:  # A crashed worker breaks the pool, report it as a failed job.
+            LOG.warning('OpenImageIO worker failed for "{}": {}'.format(job.input_path, error))
+            output.feed(str(error))
+            return 1
+        if not success:
+            LOG.warning('OpenImageIO failed to convert "{}": {}'.format(job.input_path, error))
+            for line in error.splitlines():
+                output.feed(line)
+            return 1
+        return 0
+
+    def shutdown(self) -> None:
+        """Stop worker processes."""
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+
+BACKENDS = {backend.name: backend for backend in (MaketxBackend, OiioBackend)}
+"""dict[str, type]: Available backends by name."""
+
+
+def get_backend(name: str = DEFAULT_BACKEND) -> Backend:
+    """Create conversion backend.
+
+    Falls back to maketx when the OpenImageIO bindings are not installed.
+
+    Args:
+        name: Backend name, see `BACKENDS`.
+
+    Returns:
+        Conversion backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+
+    """
+    if name not in BACKENDS:
+        raise ValueError('Unknown conversion backend "{}".'.format(name))
+
+    if name == OiioBackend.name and not oiio_available():
+        LOG.warning("OpenImageIO python bindings not found, falling back to maketx.")
+        name = MaketxBackend.name
+
+    LOG.debug('Using conversion backend "{}".'.format(name))
+    return BACKENDS[name]()
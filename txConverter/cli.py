@@ -0,0 +1,332 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Headless command line interface. Must never import Qt."""
+
+# IMPORT STANDARD LIBRARIES
+import argparse
+import fnmatch
+import functools
+import os
+import sys
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import backends
+from txConverter import convert
+from txConverter import distributed
+from txConverter import journal
+from txConverter import load_elements
+from txConverter import scan_cache
+from txConverter import watch
+from txConverter.log import LOG
+
+
+def _output_name(value: str) -> (str, str):
+    """Parse NAME=OUTPUT argument.
+
+    Args:
+        value: Argument value.
+
+    Returns:
+        Element name and output name.
+
+    """
+    name, separator, output = value.partition("=")
+    if not separator or not name or not output:
+        raise argparse.ArgumentTypeError('Expected NAME=OUTPUT, got "{}"'.format(value))
+    return name, output
+
+
+def _address(value: str) -> (str, int):
+    """Parse [HOST:]PORT argument.
+
+    Args:
+        value: Argument value.
+
+    Returns:
+        Host, localhost if omitted, and port.
+
+    """
+    host, _, port = value.rpartition(":")
+    try:
+        return host or distributed.DEFAULT_HOST, int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError('Expected [HOST:]PORT, got "{}"'.format(value))
+
+
+def parse_args(argv: [str] = None) -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Args:
+        argv (:obj: `list[str]`, optional): Arguments to parse, defaults to `sys.argv`.
+
+    Returns:
+        Parsed arguments.
+
+    """
+    parser = argparse.ArgumentParser(prog="tx_converter --headless", description="Convert images to tx files.")
+    parser.add_argument("directories", nargs="*", help="Directories to scan for images.")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("-r", "--recursive", action="store_true", help="Scan sub directories as well.")
+    parser.add_argument("--no-scan-cache", action="store_true", help="Don't use cached directory scan results.")
+    parser.add_argument("-g", "--gamma", action="store_true", help="Convert colors from sRGB to linear.")
+    parser.add_argument(
+        "-e",
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Don't convert elements with names matching the glob pattern.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-name",
+        action="append",
+        default=[],
+        type=_output_name,
+        metavar="NAME=OUTPUT",
+        help="Rename output of element NAME.",
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=convert.DEFAULT_WORKERS, help="Number of concurrent maketx processes."
+    )
+    parser.add_argument(
+        "-m",
+        "--memory-budget",
+        type=float,
+        default=None,
+        metavar="GB",
+        help="Memory budget for images converted at the same time, 0 for unlimited. Defaults to half of the RAM.",
+    )
+    parser.add_argument(
+        "--scratch",
+        metavar="DIR",
+        help="Convert into local directory DIR and publish finished files with a copy and an atomic rename.",
+    )
+    parser.add_argument(
+        "--upload-workers",
+        type=int,
+        default=convert.DEFAULT_UPLOAD_WORKERS,
+        help="Number of files from --scratch published at the same time.",
+    )
+    parser.add_argument("--report", metavar="PATH", help="Write JSON report with conversion metrics to PATH.")
+    parser.add_argument("-i", "--incremental", action="store_true", help="Skip images that are up to date.")
+    parser.add_argument(
+        "--hash", action="store_true", help="Compare source content when skipping up-to-date images."
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        choices=sorted(backends.BACKENDS),
+        default=backends.DEFAULT_BACKEND,
+        help="Conversion backend, oiio converts in-process with OpenImageIO when it is installed.",
+    )
+    parser.add_argument(
+        "-d", "--dedupe", action="store_true", help="Convert identical images once and link the other outputs."
+    )
+    parser.add_argument("--resume", action="store_true", help="Finish conversions of interrupted runs first.")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=watch.POLL_INTERVAL,
+        metavar="SECONDS",
+        help="Seconds between checks for new images in watch mode.",
+    )
+    parser.add_argument(
+        "--settle-time",
+        type=float,
+        default=watch.SETTLE_TIME,
+        metavar="SECONDS",
+        help="Seconds an image must stay unchanged before it is converted in watch mode.",
+    )
+    distribute_group = parser.add_mutually_exclusive_group()
+    distribute_group.add_argument(
+        "-w", "--watch", action="store_true", help="Keep running and convert images added to the directories."
+    )
+    distribute_group.add_argument(
+        "--serve",
+        type=_address,
+        metavar="[HOST:]PORT",
+        help="Hand out the jobs to workers started with --worker instead of converting them here. Only the local "
+        "machine can connect unless HOST is given, e.g. 0.0.0.0:{}.".format(distributed.DEFAULT_PORT),
+    )
+    distribute_group.add_argument(
+        "--worker", metavar="URL", help="Convert jobs of the coordinator at URL, e.g. http://host:{}.".format(
+            distributed.DEFAULT_PORT
+        )
+    )
+    args = parser.parse_args(argv)
+    if not args.directories and not args.resume and not args.worker:
+        parser.error("the following arguments are required: directories")
+    if args.serve:
+        for flag, value in (("--dedupe", args.dedupe), ("--scratch", args.scratch)):
+            if value:
+                parser.error("argument {}: not supported with --serve".format(flag))
+    return args
+
+
+def configure_element(args: argparse.Namespace, element) -> bool:
+    """Apply element settings from arguments.
+
+    Args:
+        args: Parsed command line arguments.
+        element (ReleasableImageElement): Element to configure.
+
+    Returns:
+        False if the element is excluded.
+
+    """
+    if any(fnmatch.fnmatch(element.name, pattern) for pattern in args.exclude):
+        LOG.debug('Excluded element: "{}"'.format(element.name))
+        return False
+
+    element.gamma = args.gamma
+    output_names = dict(args.output_name)
+    if element.name in output_names:
+        element.output = output_names[element.name]
+    return True
+
+
+def get_elements(args: argparse.Namespace) -> list:
+    """Scan directories and configure elements from arguments.
+
+    Duplicated element names are disabled in the same way as in the GUI: the first one wins.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        Elements to convert.
+
+    """
+    cache = None if args.no_scan_cache else scan_cache.ScanCache()
+    existing_names = set()
+    elements = []
+    for directory in args.directories:
+        for element in load_elements.get_elements(directory, args.recursive, cache=cache):
+            if element.name in existing_names:
+                LOG.warning('Skipping duplicated element: "{}"'.format(element.name))
+                continue
+            existing_names.add(element.name)
+            if configure_element(args, element):
+                elements.append(element)
+
+    return elements
+
+
+def main(argv: [str] = None) -> int:
+    """Convert images without GUI.
+
+    Args:
+        argv (:obj: `list[str]`, optional): Command line arguments, defaults to `sys.argv`.
+
+    Returns:
+        Exit code, 0 if all images were converted.
+
+    """
+    args = parse_args(argv)
+    if args.worker:
+        return 0 if distributed.Worker(args.worker, args.backend).run(args.workers) else 1
+
+    for directory in args.directories:
+        if not os.path.isdir(directory):
+            LOG.error('Directory "{}" does not exist.'.format(directory))
+            return 1
+
+    if not args.resume:
+        interrupted = journal.find_interrupted()
+        if interrupted:
+            LOG.info("Found {} interrupted conversion runs, use --resume to finish them.".format(len(interrupted)))
+
+    engine_options = {
+        "workers": args.workers,
+        "hash_content": args.hash,
+        "deduplicate": args.dedupe,
+        "backend": args.backend,
+        "memory_budget": None if args.memory_budget is None else int(args.memory_budget * 1024 ** 3),
+        "report_path": args.report,
+        "scratch_dir": args.scratch,
+        "upload_workers": args.upload_workers,
+    }
+
+    def run(jobs, resumed_runs: journal.InterruptedRuns = None) -> bool:
+        engine = convert.ConvertEngine(
+            incremental=args.incremental,
+            journal_path=journal.new_journal_path(),
+            resumed_runs=resumed_runs,
+            **engine_options
+        )
+        summary = engine.run(jobs)
+        LOG.info(
+            "Converted: {}, failed: {}, up to date: {}".format(summary.converted, summary.failed, summary.skipped)
+        )
+        return summary.success
+
+    success = True
+    interrupted = None
+    resumed_jobs = []
+    if args.resume:
+        interrupted = journal.InterruptedRuns()
+        if interrupted:
+            LOG.info("Resuming {} interrupted conversion runs.".format(len(interrupted)))
+            resumed_jobs = convert.load_unfinished_jobs(interrupted)
+            if not args.serve:
+                success = run(resumed_jobs, interrupted)
+
+    if args.serve:
+        jobs = list(resumed_jobs)
+        if args.directories:
+            jobs.extend(convert.get_jobs(get_elements(args)))
+        if not jobs:
+            LOG.info("No images to convert.")
+            return 0
+        coordinator = distributed.Coordinator(
+            jobs,
+            *args.serve,
+            report_path=args.report,
+            journal_path=journal.new_journal_path(),
+            resumed_runs=interrupted,
+            incremental=args.incremental,
+            hash_content=args.hash
+        )
+        summary = coordinator.serve()
+        LOG.info("Converted: {}, failed: {}, up to date: {}".format(summary.converted, summary.failed, summary.skipped))
+        return 0 if summary.success else 1
+
+    if args.watch:
+        watcher = watch.Watcher(
+            args.directories,
+            args.recursive,
+            args.poll_interval,
+            args.settle_time,
+            configure=functools.partial(configure_element, args),
+            **engine_options
+        )
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            LOG.info("Stopped watching.")
+        return 0 if success else 1
+
+    if args.directories:
+        elements = get_elements(args)
+        if not elements:
+            LOG.info("No images to convert.")
+            return 0 if success else 1
+        success = run(convert.get_jobs(elements)) and success
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,635 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Conversion engine running maketx jobs concurrently."""
+
+# IMPORT STANDARD LIBRARIES
+from concurrent import futures
+import itertools
+import os
+import shlex
+import shutil
+import tempfile
+import time
+import typing
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import backends
+from txConverter import dedupe
+from txConverter import estimate
+from txConverter import journal
+from txConverter import manifest
+from txConverter import report
+from txConverter.log import LOG
+
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+"""int: Default number of concurrent conversion processes."""
+
+DEFAULT_UPLOAD_WORKERS = 4
+"""int: Default number of staged outputs copied to their destination at the same time."""
+
+DISPATCH_WINDOW = 10000
+"""int: Number of jobs read ahead from the job iterator, which bounds the memory used by a run."""
+
+
+class ConvertJob(object):
+    """Conversion of a single image file."""
+
+    def __init__(self, argv: [str], input_path: str, output_path: str, options: [str] = None) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            argv: Conversion command arguments, executed without a shell.
+            input_path: Source file path.
+            output_path: Destination file path.
+            options (:obj: `list[str]`, optional): maketx options affecting the output.
+
+        """
+        super(ConvertJob, self).__init__()
+        self.argv = list(argv)
+        self.input_path = input_path
+        self.output_path = output_path
+        self.options = list(options or [])
+
+    @property
+    def command(self) -> str:
+        """str: Printable conversion command."""
+        return shlex.join(self.argv)
+
+    def to_dict(self) -> dict:
+        """Serialize job.
+
+        Returns:
+            JSON serializable job data.
+
+        """
+        return {"argv": self.argv, "input": self.input_path, "output": self.output_path, "options": self.options}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConvertJob":
+        """Create job from serialized data.
+
+        Args:
+            data: Data from `to_dict`.
+
+        Returns:
+            New job.
+
+        """
+        return cls(data["argv"], data["input"], data["output"], data["options"])
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(self.__class__.__name__, self.command)
+
+
+def _file_size(path: str) -> int:
+    """Get file size.
+
+    Args:
+        path: File path.
+
+    Returns:
+        Size in bytes, 0 if the file is missing.
+
+    """
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _remove_file(path: str) -> None:
+    """Remove file if it exists.
+
+    Args:
+        path: File path.
+
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class JobResult(object):
+    """Outcome and metrics of a conversion job.
+
+    Attributes:
+        exit_status (int): Exit status of the conversion, 0 on success.
+        wall_time (float): Seconds spent converting.
+        worker (str): Conversion slot that ran the job, e.g. "convert3", or "copy" for reused outputs.
+        input_bytes (int): Size of the source file.
+        output_bytes (int): Size of the converted file.
+        stats (dict[str, float]): Statistics parsed from the conversion output.
+        output (str): Last lines of the conversion output, only kept for failed jobs.
+
+    """
+
+    def __init__(
+        self,
+        job: ConvertJob,
+        success: bool,
+        exit_status: int = None,
+        wall_time: float = 0.0,
+        output: backends.JobOutput = None,
+        worker: str = "",
+    ) -> None:
+        """Initialize class and measure input and output size.
+
+        Args:
+            job: Executed job.
+            success: True if the job finished without errors.
+            exit_status (:obj: `int`, optional): Exit status of the conversion.
+            wall_time: Seconds spent converting.
+            output (:obj: `backends.JobOutput`, optional): Captured conversion output.
+            worker: Conversion slot that ran the job.
+
+        """
+        super(JobResult, self).__init__()
+        self.job = job
+        self.success = success
+        self.exit_status = (0 if success else 1) if exit_status is None else exit_status
+        self.wall_time = wall_time
+        self.worker = worker
+        self.input_bytes = _file_size(job.input_path)
+        self.output_bytes = _file_size(job.output_path) if success else 0
+        self.stats = output.stats if output else {}
+        self.output = output.text if output and not success else ""
+
+
+class RunSummary(object):
+    """Collected results of one conversion run."""
+
+    def __init__(self) -> None:
+        """Initialize class and do nothing."""
+        super(RunSummary, self).__init__()
+        self.results = []
+        self.skipped = 0
+        self.predicted_time = 0.0
+        self.run_time = 0.0
+        self.workers = 0
+        self.backend = ""
+
+    @property
+    def converted(self) -> int:
+        """int: Number of successful jobs."""
+        return sum(1 for result in self.results if result.success)
+
+    @property
+    def failed(self) -> int:
+        """int: Number of failed jobs."""
+        return sum(1 for result in self.results if not result.success)
+
+    @property
+    def success(self) -> bool:
+        """bool: True if no job failed."""
+        return not self.failed
+
+
+def load_unfinished_jobs(interrupted: journal.InterruptedRuns) -> [ConvertJob]:
+    """Get jobs of interrupted runs that still have to be converted.
+
+    Args:
+        interrupted: Locked journals of the interrupted runs.
+
+    Returns:
+        Jobs to convert.
+
+    """
+    return [ConvertJob.from_dict(data) for data in interrupted.load_unfinished()]
+
+
+def get_jobs(elements: typing.Iterable) -> typing.Iterator[ConvertJob]:
+    """Generate conversion jobs for elements.
+
+    Args:
+        elements: Elements to convert.
+
+    Yields:
+        Job for every frame of every element.
+
+    """
+    for element in elements:
+        options = element.get_options()
+        for input_path, output_path in element.iter_paths():
+            yield ConvertJob(element.build_argv(input_path, output_path, options), input_path, output_path, options)
+
+
+class ConvertEngine(object):
+    """Run conversion jobs concurrently with a conversion backend."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        callback: typing.Callable = None,
+        finished_callback: typing.Callable = None,
+        report_path: str = None,
+        journal_path: str = None,
+        resumed_runs: journal.InterruptedRuns = None,
+        incremental: bool = False,
+        hash_content: bool = False,
+        deduplicate: bool = False,
+        backend: str = backends.DEFAULT_BACKEND,
+        memory_budget: int = None,
+        scratch_dir: str = None,
+        upload_workers: int = DEFAULT_UPLOAD_WORKERS,
+        window: int = DISPATCH_WINDOW,
+    ) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            workers: Maximum number of concurrent processes.
+            callback (:obj: `callable`, optional): Called with every `JobResult` as soon as the job finishes.
+            finished_callback (:obj: `callable`, optional): Called with the report dict when the run is done.
+            report_path (:obj: `str`, optional): Write JSON report of every run to this path.
+            journal_path (:obj: `str`, optional): Append the progress of every job to this journal, which is
+                removed when the run completes.
+            resumed_runs (:obj: `journal.InterruptedRuns`, optional): Interrupted runs whose jobs are converted by
+                this run. Their journals are removed once the jobs are recorded in the journal of this run.
+            incremental: Skip jobs whose output is up to date according to the conversion manifest.
+            hash_content: Compare source content hashes when file size or modification time changed.
+            deduplicate: Convert identical inputs once and link the result to the other output paths.
+            backend: Name of conversion backend, see `backends.BACKENDS`.
+            memory_budget (:obj: `int`, optional): Maximum estimated memory in bytes used by concurrent jobs,
+                0 for unlimited. Defaults to half of the physical memory.
+            scratch_dir (:obj: `str`, optional): Write outputs to this local directory first and publish them to
+                their destination with one sequential copy and an atomic rename.
+            upload_workers: Maximum number of staged outputs published at the same time.
+            window: Number of jobs read ahead from the job iterator. Jobs are ordered and deduplicated within
+                this window.
+
+        """
+        super(ConvertEngine, self).__init__()
+        self.workers = max(1, workers)
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.report_path = report_path
+        self.journal_path = journal_path
+        self._journal = None
+        self.resumed_runs = resumed_runs
+        self.incremental = incremental
+        self.hash_content = hash_content
+        self.deduplicate = deduplicate
+        self.backend = backends.get_backend(backend)
+        self.memory_budget = estimate.default_memory_budget() if memory_budget is None else memory_budget
+        self.scratch_dir = scratch_dir
+        self.upload_workers = max(1, upload_workers)
+        self.window = max(1, window)
+
+    def _stage(self, job: ConvertJob) -> ConvertJob:
+        """Create job writing the output of a job to the scratch directory.
+
+        Args:
+            job: Job to stage.
+
+        Returns:
+            Job with a unique output path in the scratch directory.
+
+        """
+        file_handle, scratch_path = tempfile.mkstemp(suffix=os.path.splitext(job.output_path)[1], dir=self.scratch_dir)
+        os.close(file_handle)
+        argv = [scratch_path if argument == job.output_path else argument for argument in job.argv]
+        return ConvertJob(argv, job.input_path, scratch_path, job.options)
+
+    def _publish(self, result: JobResult, staged_job: ConvertJob) -> JobResult:
+        """Move staged output to its destination.
+
+        The file is copied next to the destination under a hidden name and renamed, so readers never see a partially
+        written output.
+
+        Args:
+            result: Result of the converted job.
+            staged_job: Job that wrote the output to the scratch directory.
+
+        Returns:
+            Outcome of the job including the time spent publishing.
+
+        """
+        output_path = result.job.output_path
+        temp_path = os.path.join(
+            os.path.dirname(output_path), ".{}.{}.tmp".format(os.path.basename(output_path), os.getpid())
+        )
+        start_time = time.perf_counter()
+        try:
+            shutil.copyfile(staged_job.output_path, temp_path)
+            os.replace(temp_path, output_path)
+        except OSError as error:
+            LOG.warning('Failed to publish "{}": {}'.format(output_path, error))
+            _remove_file(temp_path)
+            published = JobResult(
+                result.job, False, wall_time=result.wall_time + time.perf_counter() - start_time, worker=result.worker
+            )
+        else:
+            published = JobResult(
+                result.job,
+                True,
+                result.exit_status,
+                result.wall_time + time.perf_counter() - start_time,
+                worker=result.worker,
+            )
+        finally:
+            _remove_file(staged_job.output_path)
+        published.stats = result.stats
+        return published
+
+    def _execute(self, job: ConvertJob, staged_job: ConvertJob = None, worker: str = "") -> JobResult:
+        """Convert image with backend.
+
+        Args:
+            job: Job to execute.
+            staged_job (:obj: `ConvertJob`, optional): Job writing the output to the scratch directory instead.
+            worker: Name of the conversion slot running the job.
+
+        Returns:
+            Outcome of the job.
+
+        """
+        if self._journal:
+            self._journal.started(job)
+        output = backends.JobOutput()
+        start_time = time.perf_counter()
+        exit_status = self.backend.convert(staged_job or job, output)
+        wall_time = time.perf_counter() - start_time
+        if exit_status:
+            LOG.warning(
+                "Failed to convert {} (exit status {})\n{}".format(
+                    self.backend.describe(staged_job or job), exit_status, output.text
+                )
+            )
+            if staged_job:
+                _remove_file(staged_job.output_path)
+            return JobResult(job, False, exit_status, wall_time, output, worker)
+
+        LOG.debug('Converted: "{}"'.format(job.output_path))
+        return JobResult(job, True, exit_status, wall_time, output, worker)
+
+    def _skip_up_to_date(
+        self, jobs: typing.Iterator[ConvertJob], summary: RunSummary, manifests: manifest.ManifestStore
+    ) -> typing.Iterator[ConvertJob]:
+        """Drop jobs whose output is up to date in incremental mode.
+
+        Args:
+            jobs: Jobs to execute.
+            summary: Summary of current run, updated with skipped jobs.
+            manifests: Manifests of current run.
+
+        Yields:
+            Jobs that have to be converted.
+
+        """
+        for job in jobs:
+            if self.incremental and manifests.is_up_to_date(job):
+                summary.skipped += 1
+                continue
+            yield job
+
+    def _record_jobs(self, jobs: typing.Iterator[ConvertJob]) -> typing.Iterator[ConvertJob]:
+        """Record every job in the journal before the first one starts, so a resumed run covers all of them.
+
+        Jobs are written one window at a time and read back from the journal while converting, so they are never
+        all held in memory.
+
+        Args:
+            jobs: Jobs to execute.
+
+        Returns:
+            Iterator over the recorded jobs.
+
+        """
+        count = 0
+        pending = []
+        for job in jobs:
+            pending.append(job)
+            if len(pending) >= self.window:
+                self._journal.planned(pending)
+                count += len(pending)
+                pending = []
+        self._journal.planned(pending)
+        count += len(pending)
+        if self.resumed_runs:
+            self.resumed_runs.discard()  # All of their jobs are recorded in the journal of this run.
+        return (ConvertJob.from_dict(data) for data in journal.iter_planned(self._journal.path, count))
+
+    def _plan(
+        self,
+        jobs: typing.Iterator[ConvertJob],
+        summary: RunSummary,
+        copies: typing.Dict[ConvertJob, typing.List[ConvertJob]],
+    ) -> typing.Iterator[typing.List[ConvertJob]]:
+        """Read jobs one window at a time and order them largest first.
+
+        Args:
+            jobs: Jobs to execute.
+            summary: Summary of current run, updated with the predicted run time.
+            copies: Updated with the duplicated jobs of every job when deduplicating.
+
+        Yields:
+            Jobs of the next window in dispatch order.
+
+        """
+        finish_times = [0.0] * self.workers
+        while True:
+            pending = list(itertools.islice(jobs, self.window))
+            if not pending:
+                break
+
+            if self.deduplicate:
+                pending, window_copies = dedupe.group_jobs(pending)
+                copies.update(window_copies)
+
+            pending, costs = estimate.largest_first(pending)
+            summary.predicted_time = estimate.predict_run_time(costs, self.workers, finish_times=finish_times)
+            yield pending
+
+    def _dispatch(
+        self,
+        executor: futures.Executor,
+        batches: typing.Iterator[typing.List[ConvertJob]],
+        upload_executor: futures.Executor = None,
+    ) -> typing.Iterator[JobResult]:
+        """Start jobs in order while their estimated memory fits inside the memory budget.
+
+        When the next job doesn't fit, smaller jobs further down the queue are started instead to keep the workers
+        busy. A job larger than the whole budget is only started when nothing else is running. Memory is estimated
+        when a job is first considered, not when its batch is queued.
+
+        Args:
+            executor: Executor to run jobs in.
+            batches: Lists of jobs in dispatch order. The next list is only read when the queue runs low.
+            upload_executor (:obj: `futures.Executor`, optional): Executor publishing outputs written to the
+                scratch directory, which frees the conversion worker while the output is copied.
+
+        Yields:
+            Result of every job in the order they finish.
+
+        """
+        queue = []  # Next job last, so starting it is a cheap pop from the end.
+        memory = {}  # Job: estimated memory, only for queued jobs that were considered for starting.
+        running = {}  # Conversion future: (estimated memory, slot).
+        free_slots = list(reversed(range(self.workers)))
+        staged = {}  # Conversion future: staged job.
+        uploads = set()
+        memory_in_use = 0
+        while True:
+            while batches is not None and len(queue) < self.workers:
+                batch = next(batches, None)
+                if batch is None:
+                    batches = None
+                    break
+                queue[:0] = reversed(batch)  # Behind the jobs that are already queued.
+            if not (queue or running or uploads):
+                break
+
+            index = len(queue) - 1
+            while queue and len(running) < self.workers and index >= 0:
+                job = queue[index]
+                job_memory = memory.get(job, 0)
+                if self.memory_budget and job not in memory:
+                    job_memory = memory[job] = estimate.job_memory(job)  # Headers are only read when needed.
+                if running and self.memory_budget and memory_in_use + job_memory > self.memory_budget:
+                    index -= 1  # Doesn't fit right now, try a smaller job.
+                    continue
+                del queue[index]
+                memory.pop(job, None)
+                index -= 1
+                staged_job = self._stage(job) if upload_executor else None
+                slot = free_slots.pop()
+                future = executor.submit(self._execute, job, staged_job, "convert{}".format(slot))
+                running[future] = (job_memory, slot)
+                if staged_job:
+                    staged[future] = staged_job
+                memory_in_use += job_memory
+
+            done, _ = futures.wait(set(running) | uploads, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                if future in uploads:
+                    uploads.remove(future)
+                    yield future.result()
+                    continue
+
+                job_memory, slot = running.pop(future)
+                memory_in_use -= job_memory
+                free_slots.append(slot)
+                result = future.result()
+                staged_job = staged.pop(future, None)
+                if staged_job and result.success:
+                    uploads.add(upload_executor.submit(self._publish, result, staged_job))
+                else:
+                    yield result
+
+    def _copy_output(self, result: JobResult, job: ConvertJob) -> JobResult:
+        """Reuse converted file of a job with identical input.
+
+        Args:
+            result: Result of the converted job.
+            job: Duplicated job.
+
+        Returns:
+            Outcome of the duplicated job.
+
+        """
+        if not result.success:
+            return JobResult(job, False, result.exit_status, worker="copy")
+        start_time = time.perf_counter()
+        try:
+            dedupe.copy_output(result.job.output_path, job.output_path)
+        except OSError as error:
+            LOG.warning('Failed to copy "{}" to "{}": {}'.format(result.job.output_path, job.output_path, error))
+            return JobResult(job, False, wall_time=time.perf_counter() - start_time, worker="copy")
+        return JobResult(job, True, wall_time=time.perf_counter() - start_time, worker="copy")
+
+    def _finish(self, result: JobResult, summary: RunSummary, manifests: manifest.ManifestStore) -> None:
+        """Record and report finished job.
+
+        Args:
+            result: Result of finished job.
+            summary: Summary of current run.
+            manifests: Manifests of current run.
+
+        """
+        summary.results.append(result)
+        if self._journal:
+            self._journal.finished(result)
+        if result.success and self.incremental:
+            manifests.record(result.job)
+        if self.callback:
+            self.callback(result)
+
+    def run(self, jobs: typing.Iterable[ConvertJob]) -> RunSummary:
+        """Convert images.
+
+        Jobs are read from the iterable one window at a time, so generated jobs are never all held in memory. With a
+        journal every job is recorded before the first one starts and read back from the journal. Within a window
+        the largest jobs are started first so small jobs can fill idle workers at the end of the run. Results
+        are reported in the order the jobs finish, not the order they were submitted.
+
+        Args:
+            jobs: Jobs to execute.
+
+        Returns:
+            Results of all jobs.
+
+        """
+        summary = RunSummary()
+        summary.workers = self.workers
+        summary.backend = self.backend.name
+        manifests = manifest.ManifestStore(self.hash_content)
+        copies = {}
+        if self.journal_path:
+            self._journal = journal.Journal(self.journal_path)
+
+        upload_executor = None
+        if self.scratch_dir:
+            os.makedirs(self.scratch_dir, exist_ok=True)
+            upload_executor = futures.ThreadPoolExecutor(max_workers=self.upload_workers, thread_name_prefix="upload")
+
+        start_time = time.perf_counter()
+        self.backend.start(self.workers)
+        completed = False
+        try:
+            with futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="convert") as executor:
+                jobs = self._skip_up_to_date(iter(jobs), summary, manifests)
+                if self._journal:
+                    jobs = self._record_jobs(jobs)
+                batches = self._plan(jobs, summary, copies)
+                for result in self._dispatch(executor, batches, upload_executor):
+                    self._finish(result, summary, manifests)
+                    for job in copies.pop(result.job, []):
+                        self._finish(self._copy_output(result, job), summary, manifests)
+            completed = True
+        finally:
+            self.backend.shutdown()
+            if upload_executor:
+                upload_executor.shutdown()
+            if self._journal:
+                self._journal.close(remove=completed)
+                self._journal = None
+        if self.resumed_runs:
+            self.resumed_runs.discard()  # Only still locked when there is no journal to record their jobs in.
+        summary.run_time = time.perf_counter() - start_time
+
+        manifests.save()
+        LOG.info(
+            "Conversion took {:.1f}s, predicted {:.1f}s.".format(summary.run_time, summary.predicted_time)
+        )
+        if summary.skipped:
+            LOG.info("Skipped {} up-to-date images.".format(summary.skipped))
+
+        run_report = report.get_report(summary)
+        if self.report_path:
+            report.write_report(run_report, self.report_path)
+        if self.finished_callback:
+            self.finished_callback(run_report)
+        return summary
@@ -0,0 +1,97 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Find conversion jobs with identical input so each unique image is only converted once."""
+
+# IMPORT STANDARD LIBRARIES
+import os
+import shutil
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import manifest
+from txConverter.log import LOG
+
+
+def group_jobs(jobs: list) -> (list, dict):
+    """Group jobs converting the same image with the same options.
+
+    Jobs are grouped by (device, inode) first, which catches symlinks and hardlinks. Remaining files with the
+    same size are then compared by content hash to catch byte identical copies.
+
+    Args:
+        jobs (list[txConverter.convert.ConvertJob]): Jobs to group.
+
+    Returns:
+        Jobs to convert and a dict mapping each of them to the jobs that can reuse its output.
+
+    """
+    by_inode = {}
+    primaries = []
+    for job in jobs:
+        try:
+            stat = os.stat(job.input_path)
+        except OSError:
+            primaries.append(job)  # Let the conversion report the missing file.
+            continue
+        key = (tuple(job.options), stat.st_dev, stat.st_ino)
+        by_inode.setdefault(key, (stat.st_size, []))[1].append(job)
+
+    by_size = {}
+    for (options, _, _), (size, same_inode) in by_inode.items():
+        by_size.setdefault((options, size), []).append(same_inode)
+
+    copies = {}
+    for groups in by_size.values():
+        if len(groups) > 1:  # Only hash files that could be copies of each other.
+            by_hash = {}
+            for same_inode in groups:
+                try:
+                    digest = manifest.file_hash(same_inode[0].input_path)
+                except OSError:
+                    digest = id(same_inode)
+                by_hash.setdefault(digest, []).extend(same_inode)
+            groups = list(by_hash.values())
+
+        for same_content in groups:
+            primary = same_content[0]
+            primaries.append(primary)
+            duplicates = [job for job in same_content[1:] if job.output_path != primary.output_path]
+            if duplicates:
+                copies[primary] = duplicates
+
+    deduplicated = sum(len(duplicates) for duplicates in copies.values())
+    if deduplicated:
+        LOG.info("Found {} duplicated images that will reuse converted files.".format(deduplicated))
+    return primaries, copies
+
+
+def copy_output(source: str, destination: str) -> None:
+    """Hardlink converted file to another output path, or copy it when linking is not possible.
+
+    The destination is replaced atomically.
+
+    Args:
+        source: Converted file.
+        destination: Output path to create.
+
+    Raises:
+        OSError: If the file could neither be linked nor copied.
+
+    """
+    temp_path = "{}.{}.tmp".format(destination, os.getpid())
+    try:
+        os.link(source, temp_path)
+    except OSError:
+        shutil.copy2(source, temp_path)  # Different file systems or links not supported.
+    os.replace(temp_path, destination)
@@ -0,0 +1,517 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Distribute conversion jobs to workers on other machines.
+
+A coordinator serves the jobs over HTTP and workers pull them. Every request is a JSON POST:
+
+    /lease      {"worker": name} -> {"lease": id, "job": job, "lease_time": seconds}, {"job": null} while all jobs
+                are leased and {"finished": true} when the run is done. A job is {"input": path, "output": path,
+                "options": maketx options}.
+    /heartbeat  {"lease": id} -> 200, or 410 if the lease expired.
+    /result     {"lease": id, "exit_status": status, "wall_time": seconds, "stats": stats, "output": tail} -> 200,
+                or 410 if the lease expired.
+
+A lease that isn't renewed within `lease_time` puts the job back on the queue. Input and output paths must be
+reachable from every worker.
+
+Workers build the maketx command themselves with their own maketx executable and only accept absolute paths and
+the options txConverter produces. The protocol is not authenticated though, anyone who can reach the coordinator
+can hand out jobs writing anywhere the workers can write, so the coordinator only listens on localhost unless
+another address is given.
+
+"""
+
+# IMPORT STANDARD LIBRARIES
+import collections
+from http import server
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import backends
+from txConverter import convert
+from txConverter import estimate
+from txConverter import journal
+from txConverter import manifest
+from txConverter import report
+from txConverter.log import LOG
+
+
+DEFAULT_HOST = "127.0.0.1"
+"""str: Default coordinator address, only reachable from the same machine."""
+
+DEFAULT_PORT = 8642
+"""int: Default coordinator port."""
+
+LEASE_TIME = 60.0
+"""float: Seconds a worker may hold a job without sending a heartbeat."""
+
+MAX_ATTEMPTS = 3
+"""int: Number of expired leases before a job is reported as failed."""
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+    """Route JSON requests to the coordinator."""
+
+    def do_POST(self) -> None:
+        """Handle request."""
+        routes = {
+            "/lease": self.server.coordinator.lease,
+            "/heartbeat": self.server.coordinator.heartbeat,
+            "/result": self.server.coordinator.report,
+        }
+        if self.path not in routes:
+            self.send_error(404)
+            return
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self.send_error(400)
+            return
+        if not isinstance(data, dict):
+            self.send_error(400, "Expected a JSON object")
+            return
+
+        response = routes[self.path](data)
+        if response is None:
+            self.send_error(410, "Lease expired")
+            return
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """Log requests with the tool logger."""
+        LOG.debug("{}: {}".format(self.address_string(), format % args))
+
+
+class Coordinator(object):
+    """Serve conversion jobs to pull workers and collect their results."""
+
+    def __init__(
+        self,
+        jobs: [convert.ConvertJob],
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        lease_time: float = LEASE_TIME,
+        max_attempts: int = MAX_ATTEMPTS,
+        callback=None,
+        report_path: str = None,
+        journal_path: str = None,
+        resumed_runs: journal.InterruptedRuns = None,
+        incremental: bool = False,
+        hash_content: bool = False,
+    ) -> None:
+        """Initialize class and start listening.
+
+        Args:
+            jobs: Jobs to convert, the largest are handed out first.
+            host: Address to listen on, only the local machine by default. Use "0.0.0.0" for all interfaces.
+            port: Port to listen on, 0 picks a free port.
+            lease_time: Seconds a worker may hold a job without sending a heartbeat.
+            max_attempts: Number of expired leases before a job is reported as failed.
+            callback (:obj: `callable`, optional): Function called with the `JobResult` of every finished job.
+            report_path (:obj: `str`, optional): Write JSON report of the run to this path.
+            journal_path (:obj: `str`, optional): Append the progress of every job to this journal, which is
+                removed when the run completes.
+            resumed_runs (:obj: `journal.InterruptedRuns`, optional): Interrupted runs whose jobs are served. Their
+                journals are removed once the jobs are recorded in the journal of this run.
+            incremental: Skip jobs whose output is up to date according to the conversion manifest.
+            hash_content: Compare source content hashes when file size or modification time changed.
+
+        """
+        super(Coordinator, self).__init__()
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+        self.callback = callback
+        self.report_path = report_path
+        self.journal_path = journal_path
+        self.resumed_runs = resumed_runs
+        self.incremental = incremental
+        self._manifests = manifest.ManifestStore(hash_content)
+        self._journal = None
+        self._skipped = 0
+        pending = []
+        for job in jobs:
+            if incremental and self._manifests.is_up_to_date(job):
+                self._skipped += 1
+                continue
+            pending.append(job)
+        self.jobs, _ = estimate.largest_first(pending)
+        self._pending = collections.deque(range(len(self.jobs)))
+        self._leases = {}  # Lease id: (job index, worker, expiry time).
+        self._attempts = [0] * len(self.jobs)
+        self._results = []
+        self._lease_ids = itertools.count(1)
+        self._condition = threading.Condition()
+
+        self._server = server.ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.coordinator = self
+
+    @property
+    def url(self) -> str:
+        """str: Address workers connect to."""
+        host, port = self._server.server_address[:2]
+        if host in ("", "0.0.0.0"):
+            host = socket.gethostname()
+        return "http://{}:{}".format(host, port)
+
+    @property
+    def finished(self) -> bool:
+        """bool: True when every job has a result."""
+        return len(self._results) == len(self.jobs)
+
+    def _finish(
+        self, index: int, success: bool, exit_status: int, wall_time: float, worker: str, data: dict = None
+    ) -> None:
+        """Record result of job. Must be called with the lock held.
+
+        Args:
+            index: Job index.
+            success: True if the job was converted.
+            exit_status: Exit status of the conversion.
+            wall_time: Seconds spent converting.
+            worker: Name of the worker that ran the job.
+            data (:obj: `dict`, optional): Result request with the stats and output of the conversion.
+
+        """
+        result = convert.JobResult(self.jobs[index], success, exit_status, wall_time, worker=worker)
+        if data:
+            result.stats = data.get("stats", {})
+            result.output = data.get("output", "")
+        self._results.append(result)
+        if self._journal:
+            self._journal.finished(result)
+        if success and self.incremental:
+            self._manifests.record(result.job)
+        if self.callback:
+            self.callback(result)
+        self._condition.notify_all()
+
+    def _expire_leases(self) -> None:
+        """Put jobs of expired leases back on the queue. Must be called with the lock held."""
+        now = time.monotonic()
+        for lease_id, (index, worker, expiry) in list(self._leases.items()):
+            if expiry > now:
+                continue
+            del self._leases[lease_id]
+            self._attempts[index] += 1
+            input_path = self.jobs[index].input_path
+            if self._attempts[index] >= self.max_attempts:
+                LOG.warning('Giving up on "{}" after {} expired leases.'.format(input_path, self._attempts[index]))
+                self._finish(index, False, None, 0.0, worker)
+            else:
+                LOG.warning('Lease of "{}" by {} expired, queuing it again.'.format(input_path, worker))
+                self._pending.appendleft(index)
+
+    def lease(self, data: dict) -> dict:
+        """Hand out next job.
+
+        Args:
+            data: Request with the worker name.
+
+        Returns:
+            Lease response.
+
+        """
+        with self._condition:
+            self._expire_leases()
+            if self.finished:
+                return {"finished": True}
+            if not self._pending:
+                return {"job": None}
+            index = self._pending.popleft()
+            lease_id = next(self._lease_ids)
+            self._leases[lease_id] = (index, data.get("worker", "unknown"), time.monotonic() + self.lease_time)
+            job = self.jobs[index]
+            if self._journal:
+                self._journal.started(job)
+            return {
+                "lease": lease_id,
+                "job": {"input": job.input_path, "output": job.output_path, "options": job.options},
+                "lease_time": self.lease_time,
+            }
+
+    def heartbeat(self, data: dict) -> dict:
+        """Renew lease.
+
+        Args:
+            data: Request with the lease id.
+
+        Returns:
+            Empty response, None if the lease expired.
+
+        """
+        with self._condition:
+            if data.get("lease") not in self._leases:
+                return None
+            index, worker, _ = self._leases[data["lease"]]
+            self._leases[data["lease"]] = (index, worker, time.monotonic() + self.lease_time)
+            return {}
+
+    def report(self, data: dict) -> dict:
+        """Record result of leased job.
+
+        Args:
+            data: Request with lease id, exit status and wall time.
+
+        Returns:
+            Empty response, None if the lease expired.
+
+        """
+        with self._condition:
+            if data.get("lease") not in self._leases:
+                return None
+            index, worker, _ = self._leases.pop(data["lease"])
+            exit_status = data.get("exit_status", 1)
+            self._finish(index, exit_status == 0, exit_status, data.get("wall_time", 0.0), worker, data)
+            return {}
+
+    def serve(self) -> convert.RunSummary:
+        """Serve jobs until all of them are finished.
+
+        Returns:
+            Results of all jobs.
+
+        """
+        summary = convert.RunSummary()
+        summary.backend = "distributed"
+        summary.skipped = self._skipped
+        if self.journal_path:
+            self._journal = journal.Journal(self.journal_path)
+            self._journal.planned(self.jobs)
+        if self.resumed_runs:
+            self.resumed_runs.discard()
+
+        start_time = time.perf_counter()
+        thread = threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True)
+        thread.start()
+        LOG.info("Serving {} jobs on {}".format(len(self.jobs), self.url))
+        completed = False
+        try:
+            with self._condition:
+                while not self.finished:
+                    self._condition.wait(min(1.0, self.lease_time))
+                    self._expire_leases()
+                summary.workers = len({result.worker for result in self._results})
+                summary.results = list(self._results)
+            completed = True
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            if self._journal:
+                self._journal.close(remove=completed)
+                self._journal = None
+        summary.run_time = time.perf_counter() - start_time
+
+        self._manifests.save()
+        if summary.skipped:
+            LOG.info("Skipped {} up-to-date images.".format(summary.skipped))
+        if self.report_path:
+            report.write_report(report.get_report(summary), self.report_path)
+        return summary
+
+
+class Worker(object):
+    """Pull jobs from a coordinator and convert them with a local backend."""
+
+    def __init__(
+        self,
+        url: str,
+        backend: str = backends.DEFAULT_BACKEND,
+        name: str = None,
+        poll_interval: float = 1.0,
+        maketx: [str] = None,
+    ) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            url: Coordinator address.
+            backend: Name of the conversion backend.
+            name (:obj: `str`, optional): Worker name reported to the coordinator, defaults to the host name.
+            poll_interval: Seconds to wait before asking again while all jobs are leased.
+            maketx (:obj: `list[str]`, optional): maketx executable, defaults to `backends.MAKETX_COMMAND`.
+
+        """
+        super(Worker, self).__init__()
+        self.url = url.rstrip("/")
+        self.backend = backends.get_backend(backend)
+        self.name = name or socket.gethostname()
+        self.poll_interval = poll_interval
+        self.maketx = maketx
+        self._failed = 0
+        self._lock = threading.Lock()
+
+    def _get_job(self, data: dict) -> convert.ConvertJob:
+        """Create job from leased job data with a locally built maketx command.
+
+        Args:
+            data: Job of the lease response.
+
+        Returns:
+            Job to convert.
+
+        Raises:
+            ValueError: If the job has relative paths or options txConverter doesn't produce.
+
+        """
+        input_path, output_path, options = data["input"], data["output"], data["options"]
+        if not (isinstance(input_path, str) and os.path.isabs(input_path)):
+            raise ValueError("Input path must be absolute: {!r}".format(input_path))
+        if not (isinstance(output_path, str) and os.path.isabs(output_path)):
+            raise ValueError("Output path must be absolute: {!r}".format(output_path))
+        if options not in ([], backends.COLOR_CONVERT_OPTIONS):
+            raise ValueError("Unsupported maketx options: {!r}".format(options))
+        argv = backends.build_argv(input_path, output_path, options, self.maketx)
+        return convert.ConvertJob(argv, input_path, output_path, options)
+
+    def _request(self, path: str, data: dict) -> dict:
+        """Send request to coordinator.
+
+        Args:
+            path: Request path.
+            data: Request data.
+
+        Returns:
+            Response data, None if the lease expired.
+
+        """
+        request = urllib.request.Request(
+            self.url + path, json.dumps(data).encode("utf-8"), {"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            if error.code == 410:
+                return None
+            raise
+
+    def _heartbeat(self, lease_id: int, interval: float, stop: threading.Event) -> None:
+        """Renew lease until the job is done.
+
+        Args:
+            lease_id: Lease to renew.
+            interval: Seconds between heartbeats.
+            stop: Set when the job is done.
+
+        """
+        while not stop.wait(interval):
+            try:
+                if self._request("/heartbeat", {"lease": lease_id}) is None:
+                    LOG.warning("Lease {} expired, the job will be converted again.".format(lease_id))
+                    return
+            except OSError as error:
+                LOG.warning("Heartbeat failed: {}".format(error))
+
+    def _convert(self, lease: dict) -> bool:
+        """Convert leased job and report result.
+
+        Args:
+            lease: Lease response of the coordinator.
+
+        Returns:
+            True if the job was converted.
+
+        """
+        try:
+            job = self._get_job(lease["job"])
+        except (KeyError, TypeError, ValueError) as error:
+            LOG.warning("Rejected job {!r}: {}".format(lease["job"], error))
+            self._request("/result", {"lease": lease["lease"], "exit_status": 1, "output": str(error)})
+            return False
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(lease["lease"], lease["lease_time"] / 3, stop), daemon=True
+        )
+        heartbeat.start()
+        output = backends.JobOutput()
+        start_time = time.perf_counter()
+        try:
+            exit_status = self.backend.convert(job, output)
+        finally:
+            stop.set()
+            heartbeat.join()
+        wall_time = time.perf_counter() - start_time
+        if exit_status:
+            LOG.warning(
+                "Failed to convert {} (exit status {})\n{}".format(self.backend.describe(job), exit_status, output.text)
+            )
+        self._request(
+            "/result",
+            {
+                "lease": lease["lease"],
+                "exit_status": exit_status,
+                "wall_time": wall_time,
+                "stats": output.stats,
+                "output": output.text if exit_status else "",
+            },
+        )
+        return not exit_status
+
+    def _work(self) -> None:
+        """Convert jobs until the coordinator is done."""
+        name = "{}/{}".format(self.name, threading.current_thread().name)
+        while True:
+            try:
+                lease = self._request("/lease", {"worker": name})
+                if lease.get("finished"):
+                    return
+                if lease.get("job") is None:
+                    time.sleep(self.poll_interval)
+                    continue
+                if not self._convert(lease):
+                    with self._lock:
+                        self._failed += 1
+            except OSError as error:
+                LOG.info("Coordinator is gone, stopping worker: {}".format(error))
+                return
+
+    def run(self, workers: int = convert.DEFAULT_WORKERS) -> bool:
+        """Convert jobs until the coordinator is done.
+
+        Args:
+            workers: Number of jobs to convert at the same time.
+
+        Returns:
+            True if every job of this worker was converted.
+
+        """
+        LOG.info("Pulling jobs from {} with {} workers".format(self.url, workers))
+        self.backend.start(workers)
+        threads = [
+            threading.Thread(target=self._work, name="worker{}".format(index), daemon=True) for index in range(workers)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.backend.shutdown()
+        if self._failed:
+            LOG.warning("{} jobs failed on this worker.".format(self._failed))
+        return not self._failed
@@ -14,13 +14,38 @@
 
 # IMPORT STANDARD LIBRARIES
 import copy
+import shlex
+import typing
 
 # IMPORT THIRD-PARTY LIBRARIES
 import PyImageSequence
 
+# IMPORT LOCAL LIBRARIES
+from txConverter import backends
+
+
+OUTPUT_EXT = ".tx"
+
 
 class ReleasableImageElement(object):
-    """Row data class."""
+    """Row data class.
+
+    Elements are created for every scanned sequence, so they use slots and only store the output name when it is
+    renamed instead of a copy of the input sequence.
+
+    """
+
+    __slots__ = (
+        "input_element",
+        "enabled",
+        "gamma",
+        "duplicated",
+        "name",
+        "_output_name",
+        "_paths",
+        "_paths_key",
+        "_paths_frames",
+    )
 
     def __init__(self, imSeq: PyImageSequence.ImageElement) -> None:
         """Initialize class and do nothing.
@@ -31,12 +56,14 @@ class ReleasableImageElement(object):
         """
         super(ReleasableImageElement, self).__init__()
         self.input_element = imSeq
-        self.output_element = copy.copy(imSeq)
-        self.output_element.ext = ".tx"
         self.enabled = True
         self.gamma = False
         self.duplicated = False
         self.name = self.input_element.basename()
+        self._output_name = None  # Only set when renamed.
+        self._paths = None  # Resolved input and output paths, see `_get_paths`.
+        self._paths_key = None
+        self._paths_frames = None
 
     @property
     def tool_tip(self) -> str:
@@ -48,13 +75,47 @@ class ReleasableImageElement(object):
     @property
     def output(self):
         """str: Image name."""
-        return self.output_element.name
+        return self.input_element.name if self._output_name is None else self._output_name
 
     @output.setter
     def output(self, value):
-        self.output_element.name = value
+        self._output_name = value
+
+    @property
+    def output_element(self) -> PyImageSequence.ImageElement:
+        """PyImageSequence.ImageElement: Destination image sequence, created from the input sequence on access."""
+        element = copy.copy(self.input_element)
+        element.ext = OUTPUT_EXT
+        element.name = self.output
+        return element
+
+    def get_options(self) -> [str]:
+        """Get maketx options that affect the converted image.
+
+        Returns:
+            Command line options.
+
+        """
+        options = []
+        if self.gamma:
+            options.extend(backends.COLOR_CONVERT_OPTIONS)
+        return options
+
+    def build_argv(self, input_path: str, output_path: str, options: [str] = None) -> [str]:
+        """Build conversion command as an argument vector that can be executed without a shell.
+
+        Args:
+            input_path: Source file path.
+            output_path: Destination file path.
+            options (:obj: `list[str]`, optional): Result of `get_options`, to avoid building it for every frame.
+
+        Returns:
+            Arguments for converting image to tx file.
+
+        """
+        return backends.build_argv(input_path, output_path, self.get_options() if options is None else options)
 
-    def build_command(self, input_path, output_path) -> str:
+    def build_command(self, input_path: str, output_path: str) -> str:
         """Build conversion command.
  
         Args:
@@ -62,16 +123,61 @@ class ReleasableImageElement(object):
             output_path: Destination file path.
 
         Returns:
-            Command for converting image to tx file.
+            Printable command for converting image to tx file.
 
         """
-        command = ["maketx"]  # Name of executable.
-        command.append("-v")  # Verbose mode.
-        command.append(input_path)  # File to convert.
-        if self.gamma:
-            command.extend(["--colorconvert", "sRGB", "linear"])
-        command.extend(["-o", output_path])
-        return " ".join(command)
+        return shlex.join(self.build_argv(input_path, output_path))
+
+    def _get_paths(self) -> ([str], [str]):
+        """Get resolved input and output paths.
+
+        The paths are cached until the output name or the frames change, so long sequences are only resolved once.
+
+        Returns:
+            Source and destination file paths.
+
+        """
+        frames = self.input_element.frames
+        key = self._output_name
+        if self._paths is None or self._paths_key != key or self._paths_frames != frames:
+            self._paths = (self.input_element.getPaths(), self.output_element.getPaths())
+            self._paths_key = key
+            self._paths_frames = copy.copy(frames)
+        return self._paths
+
+    @property
+    def frame_count(self) -> int:
+        """int: Number of files converted for the element."""
+        return len(self.input_element.frames) or 1
+
+    def iter_paths(self) -> typing.Iterator[typing.Tuple[str, str]]:
+        """Pair every source frame with its destination path.
+
+        Yields:
+            Source and destination file path.
+
+        """
+        return zip(*self._get_paths())
+
+    def get_path_list(self) -> [(str, str)]:
+        """Pair every source frame with its destination path.
+
+        Returns:
+            Source and destination file paths.
+
+        """
+        return list(self.iter_paths())
+
+    def iter_commands(self) -> typing.Iterator[str]:
+        """Generate commands for converting image sequence to tx one at a time.
+
+        Yields:
+            Conversion command.
+
+        """
+        options = self.get_options()
+        for path_in, path_out in self.iter_paths():
+            yield shlex.join(self.build_argv(path_in, path_out, options))
 
     def get_command_list(self) -> [str]:
         """Generate commands for converting image sequence to tx.
@@ -80,8 +186,4 @@ class ReleasableImageElement(object):
             Conversion commands.
 
         """
-        convert_commands = []
-        for path_in, path_out in zip(self.input_element.getPaths(), self.output_element.getPaths()):
-            convert_commands.append(self.build_command(path_in, path_out))
-
-        return convert_commands
+        return list(self.iter_commands())
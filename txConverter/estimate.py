@@ -0,0 +1,234 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cost estimates used to schedule conversion jobs."""
+
+# IMPORT STANDARD LIBRARIES
+import heapq
+import importlib.util
+import os
+import struct
+
+# IMPORT LOCAL LIBRARIES
+from txConverter.log import LOG
+
+
+BYTES_PER_SECOND = 40 * 1024 * 1024
+"""int: Rough conversion throughput of a single job, used to predict run times."""
+
+MIP_OVERHEAD = 4.0 / 3.0
+"""float: Memory of a full mip chain relative to the top level."""
+
+UNCOMPRESSED_RATIO = 4
+"""int: Assumed ratio between decoded and encoded image size when the header can't be read."""
+
+_EXR_MAGIC = 20000630
+_EXR_BYTES_PER_CHANNEL = {0: 4, 1: 2, 2: 4}  # UINT, HALF, FLOAT.
+_EXR_MAX_ATTRIBUTE_SIZE = 1024 * 1024
+_EXR_MAX_NAME_SIZE = 256
+_EXR_READ_SIZE = 4096  # Headers are a few KB, read in small chunks instead of the whole file.
+
+_OIIO_AVAILABLE = importlib.util.find_spec("OpenImageIO") is not None
+
+
+def job_cost(job) -> int:
+    """Estimate cost of a conversion job from the size of its input.
+
+    Args:
+        job (txConverter.convert.ConvertJob): Job to estimate.
+
+    Returns:
+        Input size in bytes, 0 if the file is missing.
+
+    """
+    try:
+        return os.stat(job.input_path).st_size
+    except OSError:
+        return 0
+
+
+def _read_string(file_handle) -> bytes:
+    """Read null terminated string of an EXR header.
+
+    Args:
+        file_handle: Buffered binary file positioned at the string.
+
+    Returns:
+        String without the terminating null byte.
+
+    Raises:
+        ValueError: If the file ends or the string is too long.
+
+    """
+    data = b""
+    while len(data) < _EXR_MAX_NAME_SIZE:
+        character = file_handle.read(1)
+        if not character:
+            raise ValueError("Truncated EXR header.")
+        if character == b"\0":
+            return data
+        data += character
+    raise ValueError("Invalid EXR header.")
+
+
+def _read_exr_header(path: str) -> (int, int, int, int):
+    """Read resolution and channel layout from an OpenEXR header.
+
+    Attributes are read one at a time until the resolution and channels are known or the header ends.
+
+    Args:
+        path: EXR file path.
+
+    Returns:
+        Width, height, number of channels and largest number of bytes per channel.
+
+    Raises:
+        ValueError: If the file is not a readable EXR file.
+
+    """
+    width = height = None
+    channel_bytes = []
+    with open(path, "rb", buffering=_EXR_READ_SIZE) as file_handle:
+        data = file_handle.read(8)
+        if len(data) < 8 or struct.unpack_from("<i", data)[0] != _EXR_MAGIC:
+            raise ValueError("Not an EXR file.")
+
+        while width is None or not channel_bytes:
+            name = _read_string(file_handle)
+            if not name:
+                break  # End of header.
+            _read_string(file_handle)  # Attribute type.
+            (size,) = struct.unpack("<i", file_handle.read(4))
+            if not 0 <= size <= _EXR_MAX_ATTRIBUTE_SIZE:
+                raise ValueError("Invalid EXR header.")
+            data = file_handle.read(size)
+            if len(data) < size:
+                raise ValueError("Truncated EXR header.")
+            if name == b"dataWindow":
+                x_min, y_min, x_max, y_max = struct.unpack_from("<4i", data)
+                width, height = x_max - x_min + 1, y_max - y_min + 1
+            elif name == b"channels":
+                channel = 0
+                while data[channel] != 0:
+                    channel = data.index(b"\0", channel) + 1
+                    (pixel_type,) = struct.unpack_from("<i", data, channel)
+                    channel_bytes.append(_EXR_BYTES_PER_CHANNEL.get(pixel_type, 4))
+                    channel += 16  # Pixel type, pLinear, reserved and sampling.
+
+    if width is None or not channel_bytes:
+        raise ValueError("Incomplete EXR header.")
+    return width, height, len(channel_bytes), max(channel_bytes)
+
+
+def _read_oiio_header(path: str) -> (int, int, int, int):
+    """Read resolution and channel layout with OpenImageIO.
+
+    Args:
+        path: Image file path.
+
+    Returns:
+        Width, height, number of channels and number of bytes per channel.
+
+    Raises:
+        ValueError: If the file can't be opened.
+
+    """
+    import OpenImageIO
+
+    image_input = OpenImageIO.ImageInput.open(path)
+    if not image_input:
+        raise ValueError(OpenImageIO.geterror())
+    try:
+        spec = image_input.spec()
+        return spec.width, spec.height, spec.nchannels, spec.format.size()
+    finally:
+        image_input.close()
+
+
+def job_memory(job) -> int:
+    """Estimate peak memory used while converting a job.
+
+    The estimate is width * height * channels * bytes per channel * mip overhead. The resolution is read from the
+    image header, falling back to a multiple of the file size for formats that can't be read.
+
+    Args:
+        job (txConverter.convert.ConvertJob): Job to estimate.
+
+    Returns:
+        Memory in bytes.
+
+    """
+    readers = (_read_exr_header, _read_oiio_header) if _OIIO_AVAILABLE else (_read_exr_header,)
+    for reader in readers:
+        try:
+            width, height, channels, channel_size = reader(job.input_path)
+        except (OSError, ValueError, IndexError, struct.error):
+            continue
+        return int(width * height * channels * channel_size * MIP_OVERHEAD)
+
+    LOG.debug('Failed to read image header of "{}", estimating memory from file size.'.format(job.input_path))
+    return int(job_cost(job) * UNCOMPRESSED_RATIO * MIP_OVERHEAD)
+
+
+def default_memory_budget() -> int:
+    """Get default memory budget for concurrent conversions.
+
+    Returns:
+        Half of the physical memory in bytes, or 0 (unlimited) if it can't be determined.
+
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+def largest_first(jobs: list) -> (list, list):
+    """Order jobs by descending cost (longest processing time first).
+
+    Args:
+        jobs (list[txConverter.convert.ConvertJob]): Jobs to order.
+
+    Returns:
+        Ordered jobs and their costs.
+
+    """
+    costs = [job_cost(job) for job in jobs]
+    order = sorted(range(len(jobs)), key=costs.__getitem__, reverse=True)
+    return [jobs[index] for index in order], [costs[index] for index in order]
+
+
+def predict_run_time(
+    costs: [int], workers: int, bytes_per_second: float = BYTES_PER_SECOND, finish_times: [float] = None
+) -> float:
+    """Predict the total run time of jobs dispatched in the given order.
+
+    Every job is started on the worker that becomes idle first.
+
+    Args:
+        costs: Job costs in bytes in dispatch order.
+        workers: Number of concurrent jobs.
+        bytes_per_second: Throughput of a single job.
+        finish_times (:obj: `list[float]`, optional): Heap of worker finish times of jobs dispatched earlier. It is
+            updated in place, so a prediction can be continued for jobs that are dispatched later.
+
+    Returns:
+        Predicted run time in seconds.
+
+    """
+    if finish_times is None:
+        finish_times = [0.0] * max(1, min(workers, len(costs)))
+    for cost in costs:
+        heapq.heapreplace(finish_times, finish_times[0] + cost / bytes_per_second)
+    return max(finish_times)
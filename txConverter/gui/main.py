@@ -14,8 +14,8 @@
 
 # IMPORT STANDARD LIBRARIES
 import sys
-import subprocess
 import os
+import time
 
 # IMPORT THIRD-PARTY LIBRARIES
 from Qt import QtCore, QtWidgets, QtGui
@@ -23,39 +23,85 @@ from Qt import QtCore, QtWidgets, QtGui
 # IMPORT LOCAL LIBRARIES
 from txConverter.gui.widgets import tabel_widget
 from txConverter.log import LOG
+from txConverter import backends
+from txConverter import convert
+from txConverter import estimate
+from txConverter import journal
 from txConverter import load_elements
+from txConverter import report
+from txConverter import scan_cache
 from txConverter.gui import style
 
 
+BATCH_SIZE = 1000
+"""int: Maximum number of scanned elements sent to the table view at once."""
+
+BATCH_INTERVAL = 0.2
+"""float: Maximum number of seconds scanned elements are held back before they are sent to the table view."""
+
+
 class LoadElementThread(QtCore.QThread):
     """Thread class to scan directory for elements and add them to table view.
 
     Attributes:
-        add_element (<QtCore.Signal>): Signal for adding new element to table view.
+        add_elements (<QtCore.Signal>): Signal for adding a batch of new elements to table view.
         message_event (<QtCore.Signal>): Signal for sending messages to user.
 
     """
 
-    add_element = QtCore.Signal(object)
+    add_elements = QtCore.Signal(object)
     message_event = QtCore.Signal(str)
 
-    def __init__(self, parent: QtWidgets.QWidget, file_path: str) -> None:
+    def __init__(
+        self, parent: QtWidgets.QWidget, file_path: str, recursive: bool = False, cache: scan_cache.ScanCache = None
+    ) -> None:
         """Initialize class and do nothing.
 
         Args:
             parent: Parent widget.
             file_path: File path to scan.
+            recursive: Scan sub directories as well.
+            cache (:obj: `ScanCache`, optional): Cache of previously scanned directories.
 
         """
         super(LoadElementThread, self).__init__(parent)
         self.file_path = file_path
+        self.recursive = recursive
+        self.cache = cache
+        self._last_progress = 0.0
+
+    def _on_progress(self, progress: load_elements.ScanProgress) -> None:
+        """Report scan progress to user.
+
+        Args:
+            progress: Current scan progress.
+
+        """
+        now = time.monotonic()
+        if now - self._last_progress < BATCH_INTERVAL:
+            return  # Don't flood the event loop with messages.
+        self._last_progress = now
+        self.message_event.emit(
+            "Scanning: {} directories, {:.0f} files/s".format(progress.directories, progress.files_per_second)
+        )
 
     def run(self) -> None:
         """Scan directory path for images."""
         self.message_event.emit("Start scanning directory:")
-        for element in load_elements.get_elements(self.file_path):
-            self.add_element.emit(element)
-
+        batch = []
+        batch_start = time.monotonic()
+        elements = load_elements.get_elements(
+            self.file_path, self.recursive, progress=self._on_progress, cache=self.cache
+        )
+        for element in elements:
+            batch.append(element)
+            if len(batch) >= BATCH_SIZE or time.monotonic() - batch_start >= BATCH_INTERVAL:
+                self.add_elements.emit(batch)
+                batch = []
+                batch_start = time.monotonic()
+
+        if batch:
+            self.add_elements.emit(batch)
         self.message_event.emit("Scanning done:")
 
 
@@ -64,37 +110,76 @@ class ConvertThread(QtCore.QThread):
 
     Attributes:
         message_event (<QtCore.Signal>): Signal for sending messages to user.
+        job_done (<QtCore.Signal>): Signal emitted with the result of every finished job.
+        run_finished (<QtCore.Signal>): Signal emitted with the report dict when the run is done.
 
     """
 
     message_event = QtCore.Signal(str)
+    job_done = QtCore.Signal(object)
+    run_finished = QtCore.Signal(object)
 
-    def __init__(self, parent: QtWidgets.QWidget, elements) -> None:
+    def __init__(self, parent: QtWidgets.QWidget, elements, jobs: list = None, **engine_options) -> None:
         """Initialize class and do nothing.
 
         Args:
             parent: Parent widget.
             elements: Elements to process.
+            jobs (:obj: `list[ConvertJob]`, optional): Jobs to convert instead of the jobs of the elements.
+            **engine_options: Arbitrary keyword arguments passed to `ConvertEngine`.
 
         """
         super(ConvertThread, self).__init__(parent)
         self.elements = elements
+        self.jobs = jobs
+        self.engine_options = engine_options
+        self._total = 0
+        self._finished = 0
+        self._failed = 0
+
+    def _on_job_done(self, result: convert.JobResult) -> None:
+        """Report progress of finished job.
+
+        Args:
+            result: Result of finished job.
+
+        """
+        self._finished += 1
+        if not result.success:
+            self._failed += 1
+        self.job_done.emit(result)
+        self.message_event.emit(
+            "Converting images: {}/{} ({} failed)".format(self._finished, self._total, self._failed)
+        )
 
     def run(self) -> None:
         """Convert images to tx."""
-        status = True
         self.message_event.emit("Start converting images:")
-        for element in self.elements:
-            for command in element.get_command_list():
-                try:
-                    subprocess.run([command], shell=True, check=True)
-                except subprocess.CalledProcessError:
-                    LOG.warning('Failed to execute command: "{}"'.format(command))
-                    status = False
-        if status:
-            self.message_event.emit("All images converted:")
+        if self.jobs is not None:
+            jobs = self.jobs
+            self._total = len(jobs)
+        else:
+            jobs = convert.get_jobs(self.elements)  # Generated while converting.
+            self._total = sum(element.frame_count for element in self.elements)
+        engine = convert.ConvertEngine(
+            callback=self._on_job_done, finished_callback=self.run_finished.emit, **self.engine_options
+        )
+        try:
+            summary = engine.run(jobs)
+        except OSError as error:
+            LOG.exception("Conversion failed.")
+            self.message_event.emit("Conversion failed: {}".format(error))
+            return
+        details = " ({} up to date)".format(summary.skipped) if summary.skipped else ""
+        details += " Took {:.1f}s, predicted {:.1f}s.".format(summary.run_time, summary.predicted_time)
+        if summary.success:
+            self.message_event.emit("All images converted:{}".format(details))
         else:
-            self.message_event.emit("Conversion of images failed.")
+            self.message_event.emit(
+                "Conversion of images failed. {} of {} images failed.{}".format(
+                    summary.failed, len(summary.results), details
+                )
+            )
 
 
 class GroupWidget(QtWidgets.QGroupBox):
@@ -149,6 +234,7 @@ class MaketxWidget(QtWidgets.QWidget):
 
         """
         super(MaketxWidget, self).__init__(parent)
+        self.scan_cache = scan_cache.ScanCache()
         self._initialise()
         self.populate()
         self._connect()
@@ -161,19 +247,51 @@ class MaketxWidget(QtWidgets.QWidget):
         """Build gui."""
         self.scan_dir_pushbutton = QtWidgets.QPushButton("Scan Directory")
         self.directory_path_lineedit = DirectoryPathLineEdit()
+        self.recursive_checkbox = QtWidgets.QCheckBox("Recursive")
+        self.recursive_checkbox.setToolTip("Scan sub directories as well.")
 
         load_images_layout = QtWidgets.QHBoxLayout()
         load_images_layout.addWidget(self.scan_dir_pushbutton)
         load_images_layout.addWidget(self.directory_path_lineedit, 2)
+        load_images_layout.addWidget(self.recursive_checkbox)
         load_images_group = GroupWidget(load_images_layout)
 
         self.table_widget = tabel_widget.TxTableWidget()
         table_group = GroupWidget()
         table_group.main_layout.addWidget(self.table_widget)
 
+        self.workers_spinbox = QtWidgets.QSpinBox()
+        self.workers_spinbox.setRange(1, max(64, convert.DEFAULT_WORKERS))
+        self.workers_spinbox.setValue(convert.DEFAULT_WORKERS)
+        self.workers_spinbox.setToolTip("Number of images to convert at the same time.")
+
+        self.memory_spinbox = QtWidgets.QDoubleSpinBox()
+        self.memory_spinbox.setRange(0, 4096)
+        self.memory_spinbox.setSuffix(" GB")
+        self.memory_spinbox.setValue(estimate.default_memory_budget() / 1024 ** 3)
+        self.memory_spinbox.setToolTip("Memory budget for images converted at the same time, 0 for unlimited.")
+
         self.convert_button = QtWidgets.QPushButton("Convert Textures")
         button_layout = QtWidgets.QHBoxLayout()
+        self.incremental_checkbox = QtWidgets.QCheckBox("Skip up-to-date")
+        self.incremental_checkbox.setToolTip("Don't convert images that haven't changed since the last conversion.")
+
+        self.dedupe_checkbox = QtWidgets.QCheckBox("Deduplicate")
+        self.dedupe_checkbox.setToolTip("Convert identical images once and link the result to the other outputs.")
+
+        self.backend_combobox = QtWidgets.QComboBox()
+        self.backend_combobox.addItems(sorted(backends.BACKENDS))
+        self.backend_combobox.setCurrentText(backends.DEFAULT_BACKEND)
+        self.backend_combobox.setToolTip("Conversion backend, oiio converts in-process with OpenImageIO.")
+
         button_layout.addStretch()
+        button_layout.addWidget(self.backend_combobox)
+        button_layout.addWidget(self.incremental_checkbox)
+        button_layout.addWidget(self.dedupe_checkbox)
+        button_layout.addWidget(QtWidgets.QLabel("Processes:"))
+        button_layout.addWidget(self.workers_spinbox)
+        button_layout.addWidget(QtWidgets.QLabel("Memory:"))
+        button_layout.addWidget(self.memory_spinbox)
         button_layout.addWidget(self.convert_button)
         button_group = GroupWidget(button_layout)
 
@@ -194,6 +312,7 @@ class MaketxWidget(QtWidgets.QWidget):
         """Populate gui."""
         self.directory_path_lineedit.setText(os.getcwd())
         self.load_images()
+        QtCore.QTimer.singleShot(0, self.resume_interrupted)
 
     def _connect(self) -> None:
         """Connect signals."""
@@ -221,8 +340,8 @@ class MaketxWidget(QtWidgets.QWidget):
             file_path: Directory path to scan.
 
         """
-        load_tread = LoadElementThread(self, file_path)
-        load_tread.add_element.connect(self.table_widget.model.add_element)
+        load_tread = LoadElementThread(self, file_path, self.recursive_checkbox.isChecked(), self.scan_cache)
+        load_tread.add_elements.connect(self.table_widget.model.add_elements)
         load_tread.message_event.connect(self.update_info)
         load_tread.start()
 
@@ -234,10 +353,53 @@ class MaketxWidget(QtWidgets.QWidget):
             self.update_info("No images to convert:")
             return
 
-        convert_thread = ConvertThread(self, elements_to_convert)
+        convert_thread = ConvertThread(self, elements_to_convert, **self._get_engine_options())
         convert_thread.message_event.connect(self.update_info)
         convert_thread.start()
 
+    @QtCore.Slot()
+    def resume_interrupted(self) -> None:
+        """Offer to finish conversion runs that were interrupted by a crash or a closed window."""
+        interrupted = journal.InterruptedRuns()
+        if not interrupted:
+            return
+
+        answer = QtWidgets.QMessageBox.question(
+            self,
+            "Resume conversion",
+            "{} conversion runs were interrupted. Convert the remaining images?\n\n"
+            "Choosing No discards the interrupted runs.".format(len(interrupted)),
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No | QtWidgets.QMessageBox.Cancel,
+        )
+        if answer == QtWidgets.QMessageBox.Cancel:
+            interrupted.release()
+            return
+        if answer == QtWidgets.QMessageBox.No:
+            interrupted.discard()
+            return
+
+        jobs = convert.load_unfinished_jobs(interrupted)
+        convert_thread = ConvertThread(self, [], jobs=jobs, resumed_runs=interrupted, **self._get_engine_options())
+        convert_thread.message_event.connect(self.update_info)
+        convert_thread.start()
+
+    def _get_engine_options(self) -> dict:
+        """Get conversion settings from gui.
+
+        Returns:
+            Keyword arguments for `ConvertEngine`.
+
+        """
+        return {
+            "workers": self.workers_spinbox.value(),
+            "incremental": self.incremental_checkbox.isChecked(),
+            "deduplicate": self.dedupe_checkbox.isChecked(),
+            "backend": self.backend_combobox.currentText(),
+            "memory_budget": int(self.memory_spinbox.value() * 1024 ** 3),
+            "report_path": report.default_report_path(),
+            "journal_path": journal.new_journal_path(),
+        }
+
     @QtCore.Slot(str)
     def update_info(self, message: str) -> None:
         """Display message to user.
@@ -14,6 +14,9 @@
 # limitations under the License.
 
 # IMPORT STANDARD LIBRARIES
+import fnmatch
+import heapq
+import re
 import typing
 
 # IMPORT THIRD-PARTY LIBRARIES
@@ -29,6 +32,25 @@ NAME_COLUMN_INDEX = 1
 OUTPUT_NAME_COLUMN_INDEX = 2
 GAMMA_COLUMN_INDEX = 3
 
+FETCH_SIZE = 1000
+"""int: Number of rows exposed to views at once, more are fetched when the view scrolls to the end."""
+
+CACHED_ROLES = (
+    int(QtCore.Qt.DisplayRole),
+    int(QtCore.Qt.CheckStateRole),
+    int(QtCore.Qt.ToolTipRole),
+    int(QtCore.Qt.ForegroundRole),
+)
+"""tuple[int]: Roles whose data is cached per row, see `TxTableModel.data`."""
+
+SORT_KEYS = {
+    ENABLED_COLUMN_INDEX: lambda element: element.enabled,
+    NAME_COLUMN_INDEX: lambda element: element.name.lower(),
+    OUTPUT_NAME_COLUMN_INDEX: lambda element: element.output.lower(),
+    GAMMA_COLUMN_INDEX: lambda element: element.gamma,
+}
+"""dict[int, callable]: Functions returning the sort key of an element by column."""
+
 COLUMN_HEADER = {
     ENABLED_COLUMN_INDEX: {"name": "Convert", "width": 150},
     NAME_COLUMN_INDEX: {"name": "File name", "width": 200},
@@ -37,9 +59,35 @@ COLUMN_HEADER = {
 }
 
 
+def _contiguous_ranges(rows: typing.Iterable[int]) -> typing.Iterator[typing.Tuple[int, int]]:
+    """Group row numbers into contiguous ranges.
+
+    Args:
+        rows: Row numbers in any order, duplicates are ignored.
+
+    Yields:
+        First and last row of every range, starting with the highest rows.
+
+    """
+    first = last = None
+    for row in sorted(set(rows), reverse=True):
+        if last is None:
+            first = last = row
+        elif row == first - 1:
+            first = row
+        else:
+            yield first, last
+            first = last = row
+    if last is not None:
+        yield first, last
+
+
 class TxTableModel(QtCore.QAbstractTableModel):
     """Model for custom table view."""
 
+    bulk_removal_started = QtCore.Signal(object)  # Set of source rows, emitted before any of them is removed.
+    bulk_removal_finished = QtCore.Signal()
+
     def __init__(self, parent=None) -> None:
         """Initialize model.
 
@@ -50,6 +98,8 @@ class TxTableModel(QtCore.QAbstractTableModel):
         super(TxTableModel, self).__init__(parent)
         self.elements = []
         self.header = COLUMN_HEADER
+        self._name_index = {}  # Element name -> elements with that name in insertion order.
+        self._row_cache = {}  # Element -> role -> data of every column.
 
     def get_element(self, index: QtCore.QModelIndex) -> image_element.ReleasableImageElement:
         """Get element from index.
@@ -154,11 +204,24 @@ class TxTableModel(QtCore.QAbstractTableModel):
             element: New element to add.
 
         """
-        last_row = self.rowCount()
-        self.beginInsertRows(QtCore.QModelIndex(), last_row, last_row)
-        self.elements.append(element)
+        self.add_elements([element])
+
+    def add_elements(self, elements: [image_element.ReleasableImageElement]) -> None:
+        """Add multiple elements to model with a single row insertion.
+
+        Args:
+            elements: New elements to add.
+
+        """
+        if not elements:
+            return
+        for element in elements:
+            self._index_element(element)
+
+        first_row = self.rowCount()
+        self.beginInsertRows(QtCore.QModelIndex(), first_row, first_row + len(elements) - 1)
+        self.elements.extend(elements)
         self.endInsertRows()
-        self.check_for_duplicated_data()
 
     def remove_element(self, element: image_element.ReleasableImageElement) -> None:
         """Remove element from model.
@@ -167,22 +230,101 @@ class TxTableModel(QtCore.QAbstractTableModel):
             element: Element to remove.
 
         """
-        index = self.elements.index(element)
-        self.beginRemoveRows(QtCore.QModelIndex(), index, index)
-        self.elements.pop(index)
-        self.endRemoveRows()
-        self.check_for_duplicated_data()
+        self.remove_rows([self.elements.index(element)])
+
+    def remove_rows(self, rows: typing.Iterable[int]) -> None:
+        """Remove multiple rows from model.
+
+        Rows are grouped into contiguous ranges that are removed with one notification each, starting from the
+        bottom so the remaining row numbers stay valid. Duplicates are re-evaluated once afterwards. The whole
+        removal is wrapped in `bulk_removal_started` and `bulk_removal_finished`, so proxies can update once
+        instead of once per range.
+
+        Args:
+            rows: Source model rows to remove.
+
+        """
+        rows = set(rows)
+        if not rows:
+            return
+        self.bulk_removal_started.emit(rows)
+        removed = []
+        for first, last in _contiguous_ranges(rows):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            removed.extend(self.elements[first : last + 1])
+            del self.elements[first : last + 1]
+            self.endRemoveRows()
+        self.bulk_removal_finished.emit()
+        for element in removed:
+            self._row_cache.pop(element, None)
+
+        promoted = [self._unindex_element(element) for element in removed]
+        removed_ids = set(map(id, removed))
+        promoted_ids = {id(element) for element in promoted if element and id(element) not in removed_ids}
+        if not promoted_ids:
+            return
+        for row, element in enumerate(self.elements):
+            if id(element) in promoted_ids:
+                self._emit_row_changed(row)
+
+    def _index_element(self, element: image_element.ReleasableImageElement) -> None:
+        """Add element to duplicate index and flag it if the name is already taken.
+
+        Args:
+            element: Element to index.
+
+        """
+        same_name = self._name_index.setdefault(element.name, [])
+        if same_name:
+            element.enabled = False
+            element.duplicated = True
+        else:
+            element.duplicated = False
+        same_name.append(element)
+
+    def _unindex_element(
+        self, element: image_element.ReleasableImageElement
+    ) -> typing.Optional[image_element.ReleasableImageElement]:
+        """Remove element from duplicate index.
+
+        Args:
+            element: Element to remove.
+
+        Returns:
+            Element that is no longer a duplicate because the first one with its name was removed.
+
+        """
+        same_name = self._name_index.get(element.name)
+        if not same_name:
+            return None
+        was_first = same_name[0] is element
+        same_name.remove(element)
+        if not same_name:
+            del self._name_index[element.name]
+            return None
+        if was_first:
+            same_name[0].duplicated = False  # Reset duplicate, the element stays disabled.
+            self._row_cache.pop(same_name[0], None)
+            return same_name[0]
+        return None
+
+    def _emit_row_changed(self, row: int) -> None:
+        """Notify views that all columns of row changed.
+
+        Args:
+            row: Row to update.
+
+        """
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
 
     def check_for_duplicated_data(self) -> None:
-        """Check for duplicate elements."""
-        existing_elements = {}
+        """Rebuild duplicate index for all elements."""
+        self._name_index = {}
+        self._row_cache = {}
         for element in self.elements:
-            if existing_elements.get(element.name):
-                element.enabled = False
-                element.duplicated = True
-            else:
-                existing_elements[element.name] = 1  # Placeholder.
-                element.duplicated = False  # Reset duplicate.
+            self._index_element(element)
+        if self.elements:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.elements) - 1, self.columnCount() - 1))
 
     def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
         """Returns the item flags for the given index.
@@ -225,6 +367,34 @@ class TxTableModel(QtCore.QAbstractTableModel):
         if element.duplicated:
             return QtGui.QColor(190, 40, 0)
 
+    def _get_row_data(self, row: int) -> dict:
+        """Get cached data of row, computing it on first access.
+
+        Views query every visible cell for every role on each repaint, so the data is computed once per row and
+        only refreshed when the element is edited or its duplicate state changes.
+
+        Args:
+            row: Row to query.
+
+        Returns:
+            Data of every column by role.
+
+        """
+        element = self.elements[row]
+        row_data = self._row_cache.get(element)
+        if row_data is None:
+            indexes = [self.index(row, column) for column in range(self.columnCount())]
+            tool_tip = self._get_item_tooltip(indexes[0])
+            color = self._color_row(indexes[0])
+            row_data = {
+                int(QtCore.Qt.DisplayRole): [self._get_item_data(index) for index in indexes],
+                int(QtCore.Qt.CheckStateRole): [self._get_item_checked(index) for index in indexes],
+                int(QtCore.Qt.ToolTipRole): [tool_tip] * len(indexes),
+                int(QtCore.Qt.ForegroundRole): [color] * len(indexes),
+            }
+            self._row_cache[element] = row_data
+        return row_data
+
     def data(self, index: QtCore.QModelIndex, role: int = ...) -> typing.Any:
         """Request data from model.
 
@@ -237,19 +407,10 @@ class TxTableModel(QtCore.QAbstractTableModel):
 
         """
 
-        if not index.isValid():
+        if not index.isValid() or role not in CACHED_ROLES:
             return None
 
-        if role == QtCore.Qt.DisplayRole:
-            return self._get_item_data(index)  # Get data to render as text.
-
-        elif role == QtCore.Qt.CheckStateRole:
-            return self._get_item_checked(index)
-
-        elif role == QtCore.Qt.ToolTipRole:  # Get tooltip data.
-            return self._get_item_tooltip(index)
-        elif role == QtCore.Qt.ForegroundRole:
-            return self._color_row(index)
+        return self._get_row_data(index.row())[int(role)][index.column()]
 
     def setData(self, index: QtCore.QModelIndex, value: typing.Any, role: int = ...) -> bool:
         """Sets the role data for the item at index to value.
@@ -274,6 +435,7 @@ class TxTableModel(QtCore.QAbstractTableModel):
         elif column == GAMMA_COLUMN_INDEX:
             element.gamma = value
 
+        self._row_cache.pop(element, None)
         self.dataChanged.emit(index, index)
 
         return True
@@ -283,8 +445,386 @@ class TxTableModel(QtCore.QAbstractTableModel):
         LOG.debug("Clear model.")
         self.beginResetModel()
         self.elements = []
+        self._name_index = {}
+        self._row_cache = {}
         self.endResetModel()
 
     def __iter__(self):
         """Model data to iterate over."""
         return iter(self.elements)
+
+
+class TxSortFilterModel(QtCore.QAbstractProxyModel):
+    """Sort and filter proxy for `TxTableModel`.
+
+    Unlike `QSortFilterProxyModel` this never calls `data` while sorting or filtering: sort keys and lowercase
+    names are computed once per row straight from the elements, and sorting is a single `sorted` call. Added rows
+    are merged into the sorted rows, rows edited after sorting keep their position until the next sort.
+
+    Every source row is sorted and filtered, but views only see the first `rowCount` rows of the result and fetch
+    the rest in pages of `FETCH_SIZE` while scrolling.
+
+    """
+
+    def __init__(self, parent=None) -> None:
+        """Initialize model.
+
+        Args:
+            parent (:obj: `<QtCore.QObject>`, optional): Parent object.
+
+        """
+        super(TxSortFilterModel, self).__init__(parent)
+        self._rows = []  # Proxy row: source row.
+        self._proxy_rows = []  # Source row: proxy row, -1 if filtered out.
+        self._fetched = 0  # Number of proxy rows exposed to views.
+        self._bulk_removed = None  # Source rows that are being removed in bulk.
+        self._keys = {}  # Column: sort key of every source row.
+        self._search = None  # Lowercase name and output of every source row.
+        self._filter = ""
+        self._matcher = None
+        self._sort_column = -1
+        self._sort_order = QtCore.Qt.AscendingOrder
+
+    def setSourceModel(self, source_model: TxTableModel) -> None:
+        """Set model to sort and filter. Must only be called once.
+
+        Args:
+            source_model: Table model.
+
+        """
+        self.beginResetModel()
+        super(TxSortFilterModel, self).setSourceModel(source_model)
+        source_model.rowsInserted.connect(self._on_rows_inserted)
+        source_model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        source_model.rowsRemoved.connect(self._on_rows_removed)
+        source_model.bulk_removal_started.connect(self._on_bulk_removal_started)
+        source_model.bulk_removal_finished.connect(self._on_bulk_removal_finished)
+        source_model.dataChanged.connect(self._on_data_changed)
+        source_model.modelAboutToBeReset.connect(self.beginResetModel)
+        source_model.modelReset.connect(self._on_model_reset)
+        self._rebuild()
+        self.endResetModel()
+
+    def index(self, row: int, column: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:
+        """Create index for row and column."""
+        if parent.isValid() or not 0 <= row < self._fetched or not 0 <= column < self.columnCount():
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:
+        """Table rows have no parent."""
+        return QtCore.QModelIndex()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        """Get number of rows that pass the filter and were fetched."""
+        return 0 if parent.isValid() else self._fetched
+
+    def canFetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        """Check if there are rows that aren't exposed to views yet."""
+        return not parent.isValid() and self._fetched < len(self._rows)
+
+    def fetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> None:
+        """Expose next page of rows to views."""
+        if not parent.isValid():
+            self._fetch(FETCH_SIZE)
+
+    def _fetch(self, count: int) -> None:
+        """Expose rows to views.
+
+        Args:
+            count: Maximum number of rows to expose.
+
+        """
+        count = min(count, len(self._rows) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        """Get number of columns."""
+        return self.sourceModel().columnCount() if self.sourceModel() else 0
+
+    def headerData(
+        self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole
+    ) -> typing.Any:
+        """Forward column headers to the source model, they don't depend on which rows are shown."""
+        if orientation == QtCore.Qt.Horizontal and self.sourceModel():
+            return self.sourceModel().headerData(section, orientation, role)
+        return super(TxSortFilterModel, self).headerData(section, orientation, role)
+
+    def mapToSource(self, proxy_index: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        """Map proxy index to source model index."""
+        if not proxy_index.isValid():
+            return QtCore.QModelIndex()
+        return self.sourceModel().index(self._rows[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        """Map source model index to proxy index, invalid if the row is filtered out or wasn't fetched."""
+        if not source_index.isValid() or source_index.row() >= len(self._proxy_rows):
+            return QtCore.QModelIndex()
+        return self.index(self._proxy_rows[source_index.row()], source_index.column())
+
+    def _get_elements(self) -> [image_element.ReleasableImageElement]:
+        """Get elements of source rows.
+
+        Returns:
+            Elements of the source model.
+
+        """
+        return self.sourceModel().elements
+
+    def _get_search_index(self) -> [typing.Tuple[str, str]]:
+        """Get lowercase names and output names of all source rows.
+
+        Returns:
+            Search strings by source row.
+
+        """
+        if self._search is None:
+            self._search = [(element.name.lower(), element.output.lower()) for element in self._get_elements()]
+        return self._search
+
+    def _get_sort_keys(self, column: int) -> list:
+        """Get sort keys of all source rows.
+
+        Args:
+            column: Column to sort by.
+
+        Returns:
+            Sort keys by source row.
+
+        """
+        if column not in self._keys:
+            key = SORT_KEYS.get(column, SORT_KEYS[NAME_COLUMN_INDEX])
+            self._keys[column] = [key(element) for element in self._get_elements()]
+        return self._keys[column]
+
+    def _filter_rows(self, rows: typing.Iterable[int]) -> [int]:
+        """Get rows that match the filter.
+
+        Args:
+            rows: Source rows to test.
+
+        Returns:
+            Matching source rows.
+
+        """
+        if not self._matcher:
+            return list(rows)
+        search = self._get_search_index()
+        matcher = self._matcher
+        return [row for row in rows if matcher(*search[row])]
+
+    def _sort_rows(self, rows: [int]) -> [int]:
+        """Sort rows by the current sort column.
+
+        Args:
+            rows: Source rows.
+
+        Returns:
+            Source rows in sort order.
+
+        """
+        if self._sort_column < 0:
+            return sorted(rows)
+        keys = self._get_sort_keys(self._sort_column)
+        return sorted(rows, key=keys.__getitem__, reverse=self._sort_order == QtCore.Qt.DescendingOrder)
+
+    def _set_rows(self, rows: [int]) -> None:
+        """Set proxy rows and update the reverse mapping.
+
+        Args:
+            rows: Source rows in proxy order.
+
+        """
+        self._rows = rows
+        self._proxy_rows = [-1] * self.sourceModel().rowCount()
+        for proxy_row, source_row in enumerate(rows):
+            self._proxy_rows[source_row] = proxy_row
+
+    def _reset_rows(self) -> None:
+        """Filter and sort all source rows and expose the first page. Must be wrapped in a model reset."""
+        self._set_rows(self._sort_rows(self._filter_rows(range(self.sourceModel().rowCount()))))
+        self._fetched = min(FETCH_SIZE, len(self._rows))
+
+    def _rebuild(self) -> None:
+        """Recompute keys, then filter and sort all source rows. Must be wrapped in a model reset."""
+        self._keys = {}
+        self._search = None
+        self._reset_rows()
+
+    def sort(self, column: int, order: QtCore.Qt.SortOrder = QtCore.Qt.AscendingOrder) -> None:
+        """Sort rows by column.
+
+        Args:
+            column: Column to sort by, -1 restores the source order.
+            order: Sort order.
+
+        """
+        self._sort_column = column
+        self._sort_order = order
+        self._change_layout(self._sort_rows(self._rows))
+
+    def _change_layout(self, rows: [int]) -> None:
+        """Reorder proxy rows and move persistent indexes with their source rows.
+
+        The number of fetched rows stays the same, rows that end up after them are no longer shown.
+
+        Args:
+            rows: Source rows in new proxy order.
+
+        """
+        self.layoutAboutToBeChanged.emit()
+        persistent_indexes = self.persistentIndexList()
+        source_indexes = [self.mapToSource(index) for index in persistent_indexes]
+        self._set_rows(rows)
+        self.changePersistentIndexList(persistent_indexes, [self.mapFromSource(index) for index in source_indexes])
+        self.layoutChanged.emit()
+
+    def _merge_rows(self, rows: [int]) -> None:
+        """Merge new source rows into the sorted proxy rows.
+
+        Only the new rows are sorted, views are notified only if they change the fetched rows.
+
+        Args:
+            rows: New source rows.
+
+        """
+        keys = self._get_sort_keys(self._sort_column)
+        reverse = self._sort_order == QtCore.Qt.DescendingOrder
+        merged = list(heapq.merge(self._rows, self._sort_rows(rows), key=keys.__getitem__, reverse=reverse))
+        if merged[: self._fetched] == self._rows[: self._fetched]:
+            self._set_rows(merged)
+        else:
+            self._change_layout(merged)
+
+    def set_filter(self, text: str) -> None:
+        """Only show rows whose name or output name contain the text.
+
+        Text with glob characters must match the whole name, e.g. "*_diff*".
+
+        Args:
+            text: Filter text, empty shows all rows.
+
+        """
+        text = text.strip().lower()
+        if text == self._filter:
+            return
+        self._filter = text
+        if not text:
+            self._matcher = None
+        elif any(character in text for character in "*?["):
+            match = re.compile(fnmatch.translate(text)).match
+            self._matcher = lambda name, output: match(name) or match(output)
+        else:
+            self._matcher = lambda name, output: text in name or text in output
+
+        self.beginResetModel()
+        self._reset_rows()
+        self.endResetModel()
+
+    def _on_rows_inserted(self, parent: QtCore.QModelIndex, first: int, last: int) -> None:
+        """Add new source rows that match the filter, merge them into the sort order and fill the first page."""
+        if first != len(self._proxy_rows):  # Not appended, start over.
+            self.beginResetModel()
+            self._rebuild()
+            self.endResetModel()
+            return
+
+        new_elements = self.sourceModel().elements[first : last + 1]
+        if self._search is not None:
+            self._search.extend((element.name.lower(), element.output.lower()) for element in new_elements)
+        for column, keys in self._keys.items():
+            keys.extend(SORT_KEYS.get(column, SORT_KEYS[NAME_COLUMN_INDEX])(element) for element in new_elements)
+
+        self._proxy_rows.extend([-1] * (last - first + 1))
+        rows = self._filter_rows(range(first, last + 1))
+        if not rows:
+            return
+        if self._sort_column >= 0:
+            self._merge_rows(rows)
+        else:
+            for source_row in rows:  # Appended after the fetched rows, views don't know about them yet.
+                self._proxy_rows[source_row] = len(self._rows)
+                self._rows.append(source_row)
+        self._fetch(FETCH_SIZE - self._fetched)
+
+    def _on_rows_about_to_be_removed(self, parent: QtCore.QModelIndex, first: int, last: int) -> None:
+        """Remove proxy rows of source rows that are about to be removed."""
+        if self._bulk_removed is not None:
+            return
+        proxy_rows = [self._proxy_rows[row] for row in range(first, last + 1) if self._proxy_rows[row] >= 0]
+        for proxy_first, proxy_last in _contiguous_ranges(proxy_rows):
+            fetched_last = min(proxy_last, self._fetched - 1)  # Views don't know about rows that weren't fetched.
+            if fetched_last >= proxy_first:
+                self.beginRemoveRows(QtCore.QModelIndex(), proxy_first, fetched_last)
+            del self._rows[proxy_first : proxy_last + 1]
+            if fetched_last >= proxy_first:
+                self._fetched -= fetched_last - proxy_first + 1
+                self.endRemoveRows()
+
+    def _on_rows_removed(self, parent: QtCore.QModelIndex, first: int, last: int) -> None:
+        """Renumber source rows after removed rows."""
+        if self._bulk_removed is not None:
+            return
+        count = last - first + 1
+        if self._search is not None:
+            del self._search[first : last + 1]
+        for keys in self._keys.values():
+            del keys[first : last + 1]
+        self._set_rows([row - count if row > last else row for row in self._rows])
+
+    def _on_bulk_removal_started(self, source_rows: typing.Set[int]) -> None:
+        """Remove proxy rows of all source rows that are about to be removed in bulk.
+
+        Only fetched rows are removed one contiguous range at a time, all others are dropped in a single pass.
+        Source rows are renumbered once the source model finished, see `_on_bulk_removal_finished`.
+
+        Args:
+            source_rows: Source rows that will be removed.
+
+        """
+        self._bulk_removed = source_rows
+        proxy_rows = [self._proxy_rows[row] for row in source_rows if 0 <= self._proxy_rows[row] < self._fetched]
+        for proxy_first, proxy_last in _contiguous_ranges(proxy_rows):
+            self.beginRemoveRows(QtCore.QModelIndex(), proxy_first, proxy_last)
+            del self._rows[proxy_first : proxy_last + 1]
+            self._fetched -= proxy_last - proxy_first + 1
+            self.endRemoveRows()
+        self._rows = [row for row in self._rows if row not in source_rows]
+
+    def _on_bulk_removal_finished(self) -> None:
+        """Renumber source rows and drop cached keys of removed rows in a single pass."""
+        removed, self._bulk_removed = self._bulk_removed, None
+        kept = [row for row in range(len(self._proxy_rows)) if row not in removed]
+        new_rows = [-1] * len(self._proxy_rows)  # Old source row: new source row.
+        for new_row, row in enumerate(kept):
+            new_rows[row] = new_row
+        if self._search is not None:
+            self._search = [self._search[row] for row in kept]
+        self._keys = {column: [keys[row] for row in kept] for column, keys in self._keys.items()}
+        self._set_rows([new_rows[row] for row in self._rows])
+
+    def _on_data_changed(self, top_left: QtCore.QModelIndex, bottom_right: QtCore.QModelIndex, *args) -> None:
+        """Refresh cached keys of changed rows and forward the change."""
+        source_rows = range(top_left.row(), bottom_right.row() + 1)
+        elements = self.sourceModel().elements
+        for row in source_rows:
+            if self._search is not None:
+                self._search[row] = (elements[row].name.lower(), elements[row].output.lower())
+            for column, keys in self._keys.items():
+                keys[row] = SORT_KEYS.get(column, SORT_KEYS[NAME_COLUMN_INDEX])(elements[row])
+
+        proxy_rows = [self._proxy_rows[row] for row in source_rows if 0 <= self._proxy_rows[row] < self._fetched]
+        if proxy_rows:
+            self.dataChanged.emit(
+                self.index(min(proxy_rows), top_left.column()), self.index(max(proxy_rows), bottom_right.column())
+            )
+
+    def _on_model_reset(self) -> None:
+        """Rebuild after the source model was reset."""
+        self._rebuild()
+        self.endResetModel()
+
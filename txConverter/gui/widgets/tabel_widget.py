@@ -111,10 +111,13 @@ class TxTableWidget(QtWidgets.QWidget):
         """Build gui."""
         self.model = model.TxTableModel()
         self.table = TableView()
+        self.filter_lineedit = QtWidgets.QLineEdit()
+        self.filter_lineedit.setPlaceholderText("Filter names, e.g. *_diff*")
+        self.filter_lineedit.setClearButtonEnabled(True)
 
-        self.filter_model = QtCore.QSortFilterProxyModel()
+        self.filter_model = model.TxSortFilterModel()
         self.filter_model.setSourceModel(self.model)
- 
+
         self.table.setModel(self.filter_model)
         self.table.setShowGrid(False)
         self.table.verticalHeader().setVisible(False)
@@ -130,24 +133,29 @@ class TxTableWidget(QtWidgets.QWidget):
 
         layout = QtWidgets.QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.filter_lineedit)
         layout.addWidget(self.table)
         self.setLayout(layout)
 
     def _connect(self) -> None:
         """Connect signals."""
         self.table.delete_signal.connect(self._remove_items)
+        self.filter_lineedit.textChanged.connect(self.filter_model.set_filter)
 
     @QtCore.Slot()
     def _remove_items(self, items: [QtCore.QPersistentModelIndex]) -> None:
         """Remove items from table view and model.
 
         Args:
-            items: Items to remove.
+            items: Selected rows of the filter model.
 
         """
+        rows = []
         for index in items:
-            element = self.model.get_element(index)
-            self.model.remove_element(element)
+            if index.isValid():
+                proxy_index = self.filter_model.index(index.row(), index.column())
+                rows.append(self.filter_model.mapToSource(proxy_index).row())
+        self.model.remove_rows(rows)
 
 
 def __test() -> None:
@@ -0,0 +1,329 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Append-only journal of conversion runs used to resume interrupted batches.
+
+Every run writes one JSON record per line: `planned` (with the job), `started`, `done` and `failed`, keyed by the
+output path. The journal is removed when the run completes, so a journal left on disk belongs to a run that was
+interrupted. Running runs hold an exclusive lock on their journal, which the operating system releases when the
+process dies, so journals of runs that are still going are never resumed.
+
+"""
+
+# IMPORT STANDARD LIBRARIES
+import datetime
+import glob
+import json
+import os
+import threading
+import typing
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows.
+    fcntl = None
+    import msvcrt
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import user_dirs
+from txConverter.log import LOG
+
+
+PLANNED = "planned"
+STARTED = "started"
+DONE = "done"
+FAILED = "failed"
+
+_LOCK_OFFSET = 0x7FFFFFFF
+"""int: Byte locked on Windows, past the data so other handles can still read the journal."""
+
+
+def new_journal_path() -> str:
+    """Get path for the journal of a new run.
+
+    Names start with the creation time so journals sort oldest first, and end with a random suffix so runs started
+    in the same second never share a journal.
+
+    Returns:
+        Journal file path in the user cache directory.
+
+    """
+    name = datetime.datetime.now().strftime("run-%Y%m%d-%H%M%S-{}.jsonl".format(uuid.uuid4().hex))
+    return os.path.join(user_dirs.get_cache_dir("journals"), name)
+
+
+def _try_lock(file_handle) -> bool:
+    """Take exclusive lock on an open journal without waiting.
+
+    Args:
+        file_handle: Open journal file.
+
+    Returns:
+        False if another run holds the lock.
+
+    """
+    try:
+        if fcntl:
+            fcntl.flock(file_handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file_handle.seek(_LOCK_OFFSET)
+            msvcrt.locking(file_handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _find_journals(directory: str = None) -> [str]:
+    """Find journals on disk.
+
+    Args:
+        directory (:obj: `str`, optional): Directory to search, defaults to the user cache directory.
+
+    Returns:
+        Journal file paths, oldest first.
+
+    """
+    return sorted(glob.glob(os.path.join(directory or user_dirs.get_cache_dir("journals"), "*.jsonl")))
+
+
+class Journal(object):
+    """Writer of a run journal. Safe to use from multiple threads."""
+
+    def __init__(self, path: str) -> None:
+        """Open journal for appending.
+
+        Args:
+            path: Journal file path.
+
+        Raises:
+            OSError: If the journal can't be opened or is used by another run.
+
+        """
+        super(Journal, self).__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_handle = open(path, "a")
+        if not _try_lock(self._file_handle):
+            self._file_handle.close()
+            raise OSError('Journal "{}" is used by another run.'.format(path))
+
+    def _write(self, records: [dict]) -> None:
+        """Append records and flush them to disk.
+
+        Args:
+            records: Records to write.
+
+        """
+        data = "".join(json.dumps(record) + "\n" for record in records)
+        with self._lock:
+            self._file_handle.write(data)
+            self._file_handle.flush()
+            os.fsync(self._file_handle.fileno())
+
+    def planned(self, jobs: list) -> None:
+        """Record jobs of the run.
+
+        Args:
+            jobs (list[txConverter.convert.ConvertJob]): Jobs that will be converted.
+
+        """
+        self._write([{"event": PLANNED, "output": job.output_path, "job": job.to_dict()} for job in jobs])
+
+    def started(self, job) -> None:
+        """Record that a job started writing its output.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Started job.
+
+        """
+        self._write([{"event": STARTED, "output": job.output_path}])
+
+    def finished(self, result) -> None:
+        """Record outcome of a job.
+
+        Args:
+            result (txConverter.convert.JobResult): Result of finished job.
+
+        """
+        if result.success:
+            record = {"event": DONE, "output": result.job.output_path, "bytes": result.output_bytes}
+        else:
+            record = {"event": FAILED, "output": result.job.output_path}
+        self._write([record])
+
+    def close(self, remove: bool = False) -> None:
+        """Close journal.
+
+        Args:
+            remove: Delete the journal because the run completed.
+
+        """
+        self._file_handle.close()
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError as error:
+                LOG.warning('Failed to remove journal "{}": {}'.format(self.path, error))
+
+
+class InterruptedRuns(object):
+    """Journals of interrupted runs, locked so no other process resumes them at the same time."""
+
+    def __init__(self, directory: str = None) -> None:
+        """Find and lock journals of interrupted runs.
+
+        Args:
+            directory (:obj: `str`, optional): Directory to search, defaults to the user cache directory.
+
+        """
+        super(InterruptedRuns, self).__init__()
+        self._file_handles = {}
+        for path in _find_journals(directory):
+            try:
+                file_handle = open(path, "r")
+            except OSError:
+                continue  # Removed by a run that just completed.
+            if _try_lock(file_handle):
+                self._file_handles[path] = file_handle
+            else:
+                file_handle.close()
+
+    @property
+    def paths(self) -> [str]:
+        """list[str]: Locked journal file paths, oldest first."""
+        return list(self._file_handles)
+
+    def __len__(self) -> int:
+        return len(self._file_handles)
+
+    def load_unfinished(self) -> [dict]:
+        """Read jobs of all interrupted runs that have to be converted again.
+
+        An output planned by several runs is only converted once, with the job of the latest run.
+
+        Returns:
+            Job dicts, see `ConvertJob.from_dict`.
+
+        """
+        jobs = {}
+        for path in self._file_handles:
+            try:
+                jobs.update((job["output"], job) for job in load_unfinished(path))
+            except OSError as error:
+                LOG.warning('Failed to read journal "{}": {}'.format(path, error))
+        return list(jobs.values())
+
+    def release(self) -> None:
+        """Unlock journals so they can be resumed later."""
+        for file_handle in self._file_handles.values():
+            file_handle.close()
+        self._file_handles = {}
+
+    def discard(self) -> None:
+        """Remove journals, after their jobs were recorded by a new run or the user gave up on them."""
+        paths = self.paths
+        self.release()  # Open files can't be removed on Windows.
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError as error:
+                LOG.warning('Failed to remove journal "{}": {}'.format(path, error))
+
+
+def find_interrupted(directory: str = None) -> [str]:
+    """Find journals of runs that didn't complete and aren't running anymore.
+
+    Args:
+        directory (:obj: `str`, optional): Directory to search, defaults to the user cache directory.
+
+    Returns:
+        Journal file paths, oldest first.
+
+    """
+    interrupted = InterruptedRuns(directory)
+    paths = interrupted.paths
+    interrupted.release()
+    return paths
+
+
+def iter_planned(path: str, count: int) -> typing.Iterator[dict]:
+    """Read jobs planned by a run that is still appending to its journal.
+
+    Args:
+        path: Journal file path.
+        count: Number of planned jobs to read, reading stops there so later records are never read half written.
+
+    Yields:
+        Job dicts, see `ConvertJob.from_dict`.
+
+    """
+    if count <= 0:
+        return
+    with open(path, "r") as file_handle:
+        for line in file_handle:
+            record = json.loads(line)
+            if record["event"] != PLANNED:
+                continue
+            yield record["job"]
+            count -= 1
+            if not count:
+                return
+
+
+def load_unfinished(path: str) -> [dict]:
+    """Read jobs of an interrupted run that have to be converted again.
+
+    A job is unfinished if it never completed successfully, or if its recorded output is missing or has a
+    different size than when it was done. Outputs of jobs that were started but never finished may be partially
+    written and are removed.
+
+    Args:
+        path: Journal file path.
+
+    Returns:
+        Job dicts, see `ConvertJob.from_dict`.
+
+    """
+    jobs = {}
+    states = {}
+    with open(path, "r") as file_handle:
+        for line in file_handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Last line may be cut off by the crash.
+            output = record["output"]
+            if record["event"] == PLANNED:
+                jobs[output] = record["job"]
+            states[output] = record
+
+    unfinished = []
+    for output, job in jobs.items():
+        state = states[output]
+        if state["event"] == DONE:
+            try:
+                if os.stat(output).st_size == state["bytes"]:
+                    continue
+            except OSError:
+                pass
+            LOG.info('Output "{}" is missing or incomplete, converting again.'.format(output))
+        elif state["event"] == STARTED and os.path.exists(output):
+            LOG.info('Removing partially written output "{}".'.format(output))
+            try:
+                os.remove(output)
+            except OSError as error:
+                LOG.warning('Failed to remove "{}": {}'.format(output, error))
+        unfinished.append(job)
+    return unfinished
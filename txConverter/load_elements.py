@@ -12,22 +12,142 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# IMPORT STANDARD LIBRARIES
+from concurrent import futures
+import os
+import time
+import typing
+
 # IMPORT THIRD-PARTY LIBRARIES
 import PyImageSequence as pySeq
 
 # IMPORT LOCAL LIBRARIES
+from txConverter import scan_cache
 from txConverter.elements import image_element
+from txConverter.log import LOG
+
+
+DEFAULT_SCAN_WORKERS = 8
+"""int: Default number of directories scanned at the same time in recursive mode."""
+
+
+class ScanProgress(object):
+    """Progress of a directory scan."""
+
+    def __init__(self) -> None:
+        """Initialize class and do nothing."""
+        super(ScanProgress, self).__init__()
+        self.directories = 0
+        self.files = 0
+        self.start_time = time.monotonic()
+
+    @property
+    def files_per_second(self) -> float:
+        """float: Number of files scanned per second."""
+        elapsed = time.monotonic() - self.start_time
+        return self.files / elapsed if elapsed > 0 else 0.0
+
+
+def _scan_directory(path: str, cache: scan_cache.ScanCache = None) -> scan_cache.ScanResult:
+    """Find image sequences and sub directories in directory.
+
+    Args:
+        path: Directory path to scan.
+        cache (:obj: `ScanCache`, optional): Cache to read unchanged directories from.
+
+    Returns:
+        Image sequences, sub directory paths and number of files in directory.
+
+    """
+    if cache:
+        stat = os.stat(path)  # Taken before scanning so changes during the scan invalidate the entry.
+        result = cache.get(path, stat)
+        if result:
+            return result
 
+    sequences = list(pySeq.scandir(path=path))
+    directories = []
+    files = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):  # Don't follow links to avoid cycles.
+                directories.append(entry.path)
+            else:
+                files += 1
 
-def get_elements(path: str) -> [image_element.ReleasableImageElement]:
+    result = scan_cache.ScanResult(sequences, directories, files)
+    if cache:
+        cache.put(path, stat, result)
+    return result
+
+
+def _scan_recursive(
+    path: str, workers: int, progress: typing.Callable = None, cache: scan_cache.ScanCache = None
+) -> typing.Iterator[image_element.ReleasableImageElement]:
+    """Scan directory tree with a pool of threads.
+
+    Args:
+        path: Root directory to scan.
+        workers: Maximum number of directories scanned at the same time.
+        progress (:obj: `callable`, optional): Called with `ScanProgress` after every scanned directory.
+        cache (:obj: `ScanCache`, optional): Cache to read unchanged directories from.
+
+    Yields:
+        Element to add to table view model.
+
+    """
+    status = ScanProgress()
+    executor = futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="scan")
+    try:
+        running = {executor.submit(_scan_directory, path, cache): path}
+        while running:
+            done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                directory = running.pop(future)
+                try:
+                    result = future.result()
+                except OSError as error:
+                    LOG.warning('Failed to scan directory "{}": {}'.format(directory, error))
+                    continue
+
+                for sub_directory in result.directories:
+                    running[executor.submit(_scan_directory, sub_directory, cache)] = sub_directory
+
+                status.directories += 1
+                status.files += result.files
+                if progress:
+                    progress(status)
+
+                for img_seq in result.sequences:
+                    yield image_element.ReleasableImageElement(img_seq)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_elements(
+    path: str,
+    recursive: bool = False,
+    workers: int = DEFAULT_SCAN_WORKERS,
+    progress: typing.Callable = None,
+    cache: scan_cache.ScanCache = None,
+) -> [image_element.ReleasableImageElement]:
     """Scan directory for images.
 
     Args:
         path: Directory path to scan.
+        recursive: Scan sub directories as well.
+        workers: Maximum number of directories scanned at the same time in recursive mode.
+        progress (:obj: `callable`, optional): Called with `ScanProgress` after every directory in recursive mode.
+        cache (:obj: `ScanCache`, optional): Cache to read unchanged directories from.
 
     Yields:
         Element to add to table view model.
 
     """
-    for img_seq in pySeq.scandir(path=path):
+    if recursive:
+        yield from _scan_recursive(path, workers, progress, cache)
+        return
+
+    sequences = _scan_directory(path, cache).sequences if cache else pySeq.scandir(path=path)
+    for img_seq in sequences:
         yield image_element.ReleasableImageElement(img_seq)
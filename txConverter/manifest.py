@@ -0,0 +1,223 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-directory record of converted images used to skip up-to-date files."""
+
+# IMPORT STANDARD LIBRARIES
+import hashlib
+import json
+import os
+
+# IMPORT LOCAL LIBRARIES
+from txConverter.log import LOG
+
+
+MANIFEST_NAME = ".txconverter_manifest.json"
+"""str: File name of the manifest stored next to the converted images."""
+
+MANIFEST_VERSION = 1
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path: str) -> str:
+    """Hash file content.
+
+    Args:
+        path: File to hash.
+
+    Returns:
+        Hex digest of the file content.
+
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_signature(path: str) -> dict:
+    """Get size and modification time of file.
+
+    Args:
+        path: File to query.
+
+    Returns:
+        File signature or None if the file does not exist.
+
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+class Manifest(object):
+    """Conversion records for one output directory."""
+
+    def __init__(self, directory: str) -> None:
+        """Initialize class and load existing manifest.
+
+        Args:
+            directory: Directory containing the converted images.
+
+        """
+        super(Manifest, self).__init__()
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.entries = {}
+        self._modified = False
+        self._load()
+
+    def _load(self) -> None:
+        """Read manifest from disk."""
+        try:
+            with open(self.path, "r") as file_handle:
+                data = json.load(file_handle)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            LOG.warning('Ignoring unreadable manifest: "{}"'.format(self.path))
+            return
+
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("entries", {})
+
+    def is_up_to_date(self, job, hash_content: bool = False) -> bool:
+        """Check if the output of a job was built from the current source with the same options.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to check.
+            hash_content: Compare source content when size or modification time differ.
+
+        Returns:
+            True if the conversion can be skipped.
+
+        """
+        entry = self.entries.get(os.path.basename(job.output_path))
+        if not entry or entry["source"] != job.input_path or entry["options"] != job.options:
+            return False
+
+        if _stat_signature(job.output_path) != entry["output"]:
+            return False  # Output is missing or was changed by someone else.
+
+        source = _stat_signature(job.input_path)
+        if source is None:
+            return False
+        if source["size"] == entry["size"] and source["mtime"] == entry["mtime"]:
+            return True
+
+        if hash_content and entry.get("hash") and source["size"] == entry["size"]:
+            if file_hash(job.input_path) == entry["hash"]:
+                entry["mtime"] = source["mtime"]  # Source was touched but not changed.
+                self._modified = True
+                return True
+        return False
+
+    def record(self, job, hash_content: bool = False) -> None:
+        """Store conversion of job.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Successfully converted job.
+            hash_content: Store hash of the source content.
+
+        """
+        source = _stat_signature(job.input_path)
+        output = _stat_signature(job.output_path)
+        if source is None or output is None:
+            return
+
+        entry = {
+            "source": job.input_path,
+            "size": source["size"],
+            "mtime": source["mtime"],
+            "options": list(job.options),
+            "output": output,
+        }
+        if hash_content:
+            entry["hash"] = file_hash(job.input_path)
+        self.entries[os.path.basename(job.output_path)] = entry
+        self._modified = True
+
+    def save(self) -> None:
+        """Write manifest to disk if it was modified."""
+        if not self._modified:
+            return
+
+        temp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        try:
+            with open(temp_path, "w") as file_handle:
+                json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, file_handle)
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            LOG.warning('Failed to write manifest "{}": {}'.format(self.path, error))
+            return
+        self._modified = False
+
+
+class ManifestStore(object):
+    """Manifests of all output directories touched by a conversion run."""
+
+    def __init__(self, hash_content: bool = False) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            hash_content: Record and compare source content hashes.
+
+        """
+        super(ManifestStore, self).__init__()
+        self.hash_content = hash_content
+        self._manifests = {}
+
+    def _get_manifest(self, job) -> Manifest:
+        """Get manifest of the job output directory.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to query.
+
+        Returns:
+            Loaded manifest.
+
+        """
+        directory = os.path.dirname(job.output_path)
+        if directory not in self._manifests:
+            self._manifests[directory] = Manifest(directory)
+        return self._manifests[directory]
+
+    def is_up_to_date(self, job) -> bool:
+        """Check if job can be skipped.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Job to check.
+
+        Returns:
+            True if the output is up to date.
+
+        """
+        return self._get_manifest(job).is_up_to_date(job, self.hash_content)
+
+    def record(self, job) -> None:
+        """Store successful conversion.
+
+        Args:
+            job (txConverter.convert.ConvertJob): Converted job.
+
+        """
+        self._get_manifest(job).record(job, self.hash_content)
+
+    def save(self) -> None:
+        """Write all modified manifests to disk."""
+        for manifest in self._manifests.values():
+            manifest.save()
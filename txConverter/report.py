@@ -0,0 +1,137 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Machine readable reports of conversion runs."""
+
+# IMPORT STANDARD LIBRARIES
+import datetime
+import json
+import math
+import os
+import uuid
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import user_dirs
+from txConverter.log import LOG
+
+
+REPORT_VERSION = 1
+
+KEEP_REPORTS = 50
+"""int: Number of reports kept in the user cache directory, older ones are removed."""
+
+
+def percentile(values: [float], fraction: float) -> float:
+    """Get nearest-rank percentile.
+
+    Args:
+        values: Values to query.
+        fraction: Percentile between 0 and 1.
+
+    Returns:
+        Percentile value, 0 for no values.
+
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def get_report(summary) -> dict:
+    """Build report of a conversion run.
+
+    Args:
+        summary (txConverter.convert.RunSummary): Summary of the run.
+
+    Returns:
+        JSON serializable report with per-job metrics and aggregate throughput.
+
+    """
+    results = summary.results
+    input_bytes = sum(result.input_bytes for result in results)
+    latencies = [result.wall_time for result in results]
+    run_time = summary.run_time
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "backend": summary.backend,
+        "workers": summary.workers,
+        "converted": summary.converted,
+        "failed": summary.failed,
+        "skipped": summary.skipped,
+        "run_time": run_time,
+        "predicted_time": summary.predicted_time,
+        "files_per_second": len(results) / run_time if run_time else 0.0,
+        "megabytes_per_second": input_bytes / 1024 ** 2 / run_time if run_time else 0.0,
+        "input_bytes": input_bytes,
+        "output_bytes": sum(result.output_bytes for result in results),
+        "latency": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95)},
+        "jobs": [
+            {
+                "input": result.job.input_path,
+                "output": result.job.output_path,
+                "input_bytes": result.input_bytes,
+                "output_bytes": result.output_bytes,
+                "wall_time": result.wall_time,
+                "exit_status": result.exit_status,
+                "worker": result.worker,
+                "stats": result.stats,
+                "output": result.output,
+            }
+            for result in results
+        ],
+    }
+
+
+def default_report_path(keep: int = KEEP_REPORTS) -> str:
+    """Get a new report path in the user cache directory.
+
+    Reports are named by their creation time and a random suffix, the oldest are removed so only `keep` reports
+    remain including the new one.
+
+    Args:
+        keep: Number of reports to keep.
+
+    Returns:
+        Report file path.
+
+    """
+    directory = user_dirs.get_cache_dir("reports")
+    reports = sorted(name for name in os.listdir(directory) if name.startswith("run-") and name.endswith(".json"))
+    for name in reports[: max(0, len(reports) - keep + 1)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError as error:
+            LOG.debug('Failed to remove old report "{}": {}'.format(name, error))
+
+    name = datetime.datetime.now().strftime("run-%Y%m%d-%H%M%S-{}.json".format(uuid.uuid4().hex))
+    return os.path.join(directory, name)
+
+
+def write_report(report: dict, path: str) -> None:
+    """Write report as JSON.
+
+    Args:
+        report: Report from `get_report`.
+        path: Destination file path.
+
+    """
+    try:
+        with open(path, "w") as file_handle:
+            json.dump(report, file_handle, indent=2)
+    except OSError as error:
+        LOG.warning('Failed to write conversion report "{}": {}'.format(path, error))
+        return
+    LOG.info('Conversion report written to "{}".'.format(path))
@@ -0,0 +1,199 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""On-disk cache of directory scan results keyed by directory mtime and inode."""
+
+# IMPORT STANDARD LIBRARIES
+import hashlib
+import json
+import os
+import threading
+
+# IMPORT THIRD-PARTY LIBRARIES
+import PyImageSequence as pySeq
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import user_dirs
+from txConverter.log import LOG
+
+
+CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+"""int: Default maximum size of the scan cache on disk."""
+
+
+class ScanResult(object):
+    """Content of one scanned directory."""
+
+    def __init__(self, sequences: list, directories: [str], files: int) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            sequences: Image sequences in directory.
+            directories: Sub directory paths.
+            files: Number of files in directory.
+
+        """
+        super(ScanResult, self).__init__()
+        self.sequences = sequences
+        self.directories = directories
+        self.files = files
+
+
+def _directory_key(stat: os.stat_result) -> dict:
+    """Get values that change when the content of a directory changes.
+
+    Args:
+        stat: Directory stat.
+
+    Returns:
+        Cache validation key.
+
+    """
+    return {"mtime": stat.st_mtime_ns, "inode": stat.st_ino, "device": stat.st_dev}
+
+
+class ScanCache(object):
+    """Directory scan results stored as one file per directory in the user cache directory.
+
+    Entries are evicted least recently used first when the cache grows beyond `max_bytes`.
+
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            cache_dir (:obj: `str`, optional): Directory to store cache entries in.
+            max_bytes: Maximum size of all cache entries.
+
+        """
+        super(ScanCache, self).__init__()
+        self.cache_dir = cache_dir or user_dirs.get_cache_dir("scan")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _entry_path(self, path: str) -> str:
+        """Get cache file path of directory.
+
+        Args:
+            path: Scanned directory.
+
+        Returns:
+            Cache entry file path.
+
+        """
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.cache_dir, name + ".json")
+
+    def get(self, path: str, stat: os.stat_result) -> ScanResult:
+        """Get cached scan result if the directory is unchanged.
+
+        Args:
+            path: Scanned directory.
+            stat: Current stat of the directory.
+
+        Returns:
+            Cached result or None.
+
+        """
+        entry_path = self._entry_path(path)
+        try:
+            with open(entry_path, "r") as file_handle:
+                entry = json.load(file_handle)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("version") != CACHE_VERSION or entry.get("key") != _directory_key(stat):
+            return None
+
+        try:
+            os.utime(entry_path)  # Mark entry as recently used.
+        except OSError:
+            pass
+
+        sequences = []
+        for file_path, frames in entry["sequences"]:
+            sequence = pySeq.ImageElement(file_path)
+            if frames:
+                sequence.frames = frames
+            sequences.append(sequence)
+        return ScanResult(sequences, entry["directories"], entry["files"])
+
+    def put(self, path: str, stat: os.stat_result, result: ScanResult) -> None:
+        """Store scan result.
+
+        Args:
+            path: Scanned directory.
+            stat: Stat of the directory taken before it was scanned.
+            result: Scan result to store.
+
+        """
+        entry = {
+            "version": CACHE_VERSION,
+            "key": _directory_key(stat),
+            "sequences": [[sequence.getFilePath(), list(sequence.frames)] for sequence in result.sequences],
+            "directories": result.directories,
+            "files": result.files,
+        }
+        data = json.dumps(entry)
+        entry_path = self._entry_path(path)
+        temp_path = "{}.{}.{}.tmp".format(entry_path, os.getpid(), threading.get_ident())
+        try:
+            replaced_size = os.stat(entry_path).st_size
+        except OSError:
+            replaced_size = 0
+        try:
+            with open(temp_path, "w") as file_handle:
+                file_handle.write(data)
+            os.replace(temp_path, entry_path)
+        except OSError as error:
+            LOG.debug('Failed to write scan cache entry for "{}": {}'.format(path, error))
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += len(data) - replaced_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _disk_usage(self) -> int:
+        """Get total size of cache entries.
+
+        Returns:
+            Size in bytes.
+
+        """
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json"))
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache is below 80% of its maximum size."""
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if size <= self.max_bytes * 0.8:
+                break
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            size -= entry.stat().st_size
+        self._size = size
+        LOG.debug("Scan cache evicted to {} bytes.".format(size))
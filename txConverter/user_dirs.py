@@ -0,0 +1,46 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-user directories for data written by the tool."""
+
+# IMPORT STANDARD LIBRARIES
+import os
+import sys
+
+
+def get_cache_dir(*sub_directories: str) -> str:
+    """Get user cache directory and create it if missing.
+
+    The location can be overridden with the environment variable `TXCONVERTER_CACHE_DIR`.
+
+    Args:
+        *sub_directories: Sub directory names inside the cache directory.
+
+    Returns:
+        Directory path.
+
+    """
+    root = os.getenv("TXCONVERTER_CACHE_DIR")
+    if not root:
+        if sys.platform == "win32":
+            base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+        elif sys.platform == "darwin":
+            base = os.path.expanduser("~/Library/Caches")
+        else:
+            base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        root = os.path.join(base, "txConverter")
+
+    path = os.path.join(root, *sub_directories)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,249 @@
+# Copyright (C) 2020  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Watch directories and convert new or changed images as they arrive.
+
+Only the modification time of every known directory is checked on each poll, which is one stat call per directory,
+so idle folders cost next to nothing. Directories that changed are listed again to find new and replaced files.
+Files overwritten in place don't change their directory, those are picked up by a full rescan every
+`rescan_interval` seconds.
+
+A file is converted once its size and modification time have been stable for `settle_time` seconds, so images that
+are still being written are left alone. Conversions are incremental, which makes a restarted watcher skip
+everything that was already converted.
+
+"""
+
+# IMPORT STANDARD LIBRARIES
+import collections
+import os
+import threading
+import time
+import typing
+
+# IMPORT LOCAL LIBRARIES
+from txConverter import convert
+from txConverter import journal
+from txConverter import load_elements
+from txConverter import manifest
+from txConverter.elements import image_element
+from txConverter.log import LOG
+
+
+POLL_INTERVAL = 5.0
+"""float: Seconds between checks for changed directories."""
+
+SETTLE_TIME = 10.0
+"""float: Seconds a file must stay unchanged before it is converted."""
+
+RESCAN_INTERVAL = 600.0
+"""float: Seconds between full rescans that find files overwritten in place."""
+
+
+def _is_source(name: str) -> bool:
+    """Check if file can be a conversion source.
+
+    Args:
+        name: File name.
+
+    Returns:
+        False for hidden files, manifests and converted files.
+
+    """
+    if name.startswith(".") or name == manifest.MANIFEST_NAME:
+        return False
+    return not name.endswith(image_element.OUTPUT_EXT)
+
+
+class Watcher(object):
+    """Poll directory trees and convert images that were added or changed."""
+
+    def __init__(
+        self,
+        roots: [str],
+        recursive: bool = True,
+        interval: float = POLL_INTERVAL,
+        settle_time: float = SETTLE_TIME,
+        rescan_interval: float = RESCAN_INTERVAL,
+        configure: typing.Callable = None,
+        **engine_options
+    ) -> None:
+        """Initialize class and do nothing.
+
+        Args:
+            roots: Directories to watch.
+            recursive: Watch sub directories as well.
+            interval: Seconds between checks for changed directories.
+            settle_time: Seconds a file must stay unchanged before it is converted.
+            rescan_interval: Seconds between full rescans, 0 to disable them.
+            configure (:obj: `callable`, optional): Called with every element before conversion, returning False
+                skips the element.
+            **engine_options: Arbitrary keyword arguments passed to `ConvertEngine`.
+
+        """
+        super(Watcher, self).__init__()
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.recursive = recursive
+        self.interval = interval
+        self.settle_time = settle_time
+        self.rescan_interval = rescan_interval
+        self.configure = configure
+        self.engine_options = engine_options
+        self._directories = {}  # Directory path: modification time.
+        self._files = {}  # Directory path: file name: (size, modification time).
+        self._settling = {}  # File path: ((size, modification time), time the signature was first seen).
+        self._last_rescan = time.monotonic()
+
+    def _scan_directory(self, directory: str, now: float) -> [str]:
+        """List directory and start settling files that are new or changed.
+
+        Args:
+            directory: Directory to list.
+            now: Current monotonic time.
+
+        Returns:
+            Sub directories.
+
+        """
+        known = self._files.get(directory, {})
+        files = {}
+        sub_directories = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_directories.append(entry.path)
+                        continue
+                    if not entry.is_file() or not _is_source(entry.name):
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Removed while listing.
+                signature = (stat.st_size, stat.st_mtime_ns)
+                files[entry.name] = signature
+                if known.get(entry.name) != signature and entry.path not in self._settling:
+                    self._settling[entry.path] = (signature, now)
+        self._files[directory] = files
+        return sub_directories
+
+    def _check_directories(self, now: float, rescan: bool = False) -> None:
+        """Find directories that changed since the last poll and scan them.
+
+        Args:
+            now: Current monotonic time.
+            rescan: Scan every directory, even if it didn't change.
+
+        """
+        queue = collections.deque(self.roots + list(self._directories))
+        seen = set()
+        while queue:
+            directory = queue.popleft()
+            if directory in seen:
+                continue
+            seen.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._forget_directory(directory)
+                continue
+            if not rescan and self._directories.get(directory) == mtime:
+                continue
+
+            self._directories[directory] = mtime  # Taken before listing so changes during the scan are seen again.
+            try:
+                sub_directories = self._scan_directory(directory, now)
+            except OSError as error:
+                LOG.warning('Failed to scan directory "{}": {}'.format(directory, error))
+                continue
+            if self.recursive:
+                queue.extend(path for path in sub_directories if path not in self._directories)
+
+    def _forget_directory(self, directory: str) -> None:
+        """Stop watching removed directory.
+
+        Args:
+            directory: Removed directory.
+
+        """
+        self._directories.pop(directory, None)
+        for name in self._files.pop(directory, {}):
+            self._settling.pop(os.path.join(directory, name), None)
+
+    def poll(self) -> typing.Dict[str, typing.Set[str]]:
+        """Check for new and changed files.
+
+        Returns:
+            File paths that settled by directory.
+
+        """
+        now = time.monotonic()
+        rescan = bool(self.rescan_interval) and now - self._last_rescan >= self.rescan_interval
+        if rescan:
+            self._last_rescan = now
+        self._check_directories(now, rescan)
+
+        ready = collections.defaultdict(set)
+        for path, (signature, since) in list(self._settling.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._settling[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self._settling[path] = (current, now)  # Still being written.
+            elif now - since >= self.settle_time:
+                del self._settling[path]
+                ready[os.path.dirname(path)].add(path)
+        return ready
+
+    def get_jobs(self, ready: typing.Dict[str, typing.Set[str]]) -> [convert.ConvertJob]:
+        """Get conversion jobs for settled files.
+
+        Args:
+            ready: File paths that settled by directory.
+
+        Returns:
+            Jobs converting settled frames.
+
+        """
+        jobs = []
+        for directory, paths in ready.items():
+            try:
+                elements = list(load_elements.get_elements(directory))
+            except OSError as error:
+                LOG.warning('Failed to scan directory "{}": {}'.format(directory, error))
+                continue
+            if self.configure:
+                elements = [element for element in elements if self.configure(element) is not False]
+            jobs.extend(job for job in convert.get_jobs(elements) if job.input_path in paths)
+        return jobs
+
+    def run(self, stop: threading.Event = None) -> None:
+        """Watch directories until stopped.
+
+        Args:
+            stop (:obj: `threading.Event`, optional): Set to stop watching, runs forever by default.
+
+        """
+        stop = stop or threading.Event()
+        engine_options = dict(self.engine_options, incremental=True)
+        LOG.info("Watching {} for new images.".format(", ".join(self.roots)))
+        while not stop.is_set():
+            jobs = self.get_jobs(self.poll())
+            if jobs:
+                LOG.info("Converting {} new or changed images.".format(len(jobs)))
+                engine_options["journal_path"] = journal.new_journal_path()
+                convert.ConvertEngine(**engine_options).run(jobs)
+            stop.wait(self.interval)